@@ -5,6 +5,7 @@ from flask_caching import Cache
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import os
+from app.engine import engine_options, configure_engine
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -12,8 +13,14 @@ migrate = Migrate()
 cache = Cache()
 limiter = Limiter(key_func=get_remote_address)
 
-def create_app(config_name=None):
-    """Application factory function to create and configure the Flask app"""
+def create_app(config_name=None, config_overrides=None):
+    """
+    Application factory function to create and configure the Flask app
+    
+    Args:
+        config_name (str): development, testing or production (default: FLASK_CONFIG)
+        config_overrides (dict): Settings applied last, e.g. by load test scripts
+    """
     app = Flask(__name__, instance_relative_config=True)
     
     # Load default configuration
@@ -26,6 +33,8 @@ def create_app(config_name=None):
     
     # Load the instance config, if it exists
     app.config.from_pyfile('config.py', silent=True)
+    if config_overrides:
+        app.config.update(config_overrides)
     
     # Ensure the instance folder exists
     try:
@@ -33,8 +42,13 @@ def create_app(config_name=None):
     except OSError:
         pass
     
+    # Tune the database engine for concurrent workers and requests
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    
     # Initialize extensions with app
     db.init_app(app)
+    with app.app_context():
+        configure_engine(db.engine, app.config)
     migrate.init_app(app, db)
     cache.init_app(app)
     limiter.init_app(app)
@@ -43,9 +57,17 @@ def create_app(config_name=None):
     from app.routes.main import main_bp
     from app.routes.api import api_bp
     from app.routes.rss import rss_bp
+    from app.routes.podcast import podcast_bp
+    from app.routes.websub import websub_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp, url_prefix='/api')
     app.register_blueprint(rss_bp)
+    app.register_blueprint(podcast_bp)
+    app.register_blueprint(websub_bp)
+    
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
     
     return app
\ No newline at end of file
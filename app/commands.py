@@ -0,0 +1,72 @@
+import os
+import click
+from sqlalchemy import bindparam
+from app import db
+from app.config import Config
+from app.models.audio_content import AudioContent
+from app.models.types import train_dictionary
+
+
+def register_commands(app):
+    """Register maintenance commands with the flask CLI"""
+
+    @app.cli.command('train-text-dict')
+    @click.option('--samples', default=2000, help='Number of recent articles to train on')
+    @click.option('--size', default=112640, help='Dictionary size in bytes')
+    @click.argument('output')
+    def train_text_dict(samples, size, output):
+        """Train a zstd dictionary for stored article text and write it to OUTPUT"""
+        rows = db.session.query(AudioContent.processed_text).filter(AudioContent.processed_text.isnot(None))\
+                                                            .order_by(AudioContent.id.desc())\
+                                                            .limit(samples).all()
+        if not rows:
+            raise click.ClickException("No processed articles to train on")
+
+        with open(output, 'wb') as f:
+            f.write(train_dictionary([text for (text,) in rows], size))
+        click.echo(f"Trained a {size} byte dictionary on {len(rows)} articles; "
+                   f"set TEXT_COMPRESSION_DICT={output} and run 'flask recompress-text'")
+
+    @app.cli.command('recompress-text')
+    @click.option('--batch-size', default=500, help='Rows rewritten per transaction')
+    def recompress_text(batch_size):
+        """Rewrite stored article text with the current compression settings"""
+        table = AudioContent.__table__
+        statement = table.update().where(table.c.id == bindparam('row_id')).values(
+            original_text=bindparam('original'), processed_text=bindparam('processed')
+        )
+
+        last_id, rewritten = 0, 0
+        while True:
+            rows = db.session.query(AudioContent.id, AudioContent.original_text, AudioContent.processed_text)\
+                             .filter(AudioContent.id > last_id)\
+                             .order_by(AudioContent.id)\
+                             .limit(batch_size).all()
+            if not rows:
+                break
+
+            db.session.execute(statement, [
+                {'row_id': row.id, 'original': row.original_text, 'processed': row.processed_text}
+                for row in rows
+            ])
+            db.session.commit()
+            last_id = rows[-1].id
+            rewritten += len(rows)
+            click.echo(f"Rewrote {rewritten} rows")
+
+        click.echo(f"Done: {rewritten} rows now use {Config.TEXT_COMPRESSION}")
+
+    @app.cli.command('backfill-file-sizes')
+    def backfill_file_sizes():
+        """Record the size of audio files converted before file sizes were stored"""
+        rows = db.session.query(AudioContent.id, AudioContent.file_path)\
+                         .filter(AudioContent.file_path.isnot(None), AudioContent.file_size.is_(None)).all()
+        updated = 0
+        for row_id, file_path in rows:
+            path = os.path.join(app.root_path, file_path)
+            if os.path.exists(path):
+                AudioContent.query.filter_by(id=row_id).update({'file_size': os.path.getsize(path)},
+                                                               synchronize_session=False)
+                updated += 1
+        db.session.commit()
+        click.echo(f"Recorded file sizes for {updated} of {len(rows)} rows")
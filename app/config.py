@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -15,13 +16,24 @@ class Config:
     # SQLAlchemy settings
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///blog2audio.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite: applied to every connection
+    SQLITE_JOURNAL_MODE = 'WAL'
+    SQLITE_SYNCHRONOUS = 'NORMAL'
+    SQLITE_BUSY_TIMEOUT = 30  # Seconds a writer waits for the lock
+    # Server databases (Postgres): connection pool per process
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = 30
+    DB_POOL_RECYCLE = 30 * 60
     
     # Cache settings
     CACHE_TYPE = 'SimpleCache'
     CACHE_DEFAULT_TIMEOUT = 300  # 5 minutes
+    RESPONSE_CACHE_TIMEOUT = 24 * 60 * 60  # Finished-job pages; dropped early when the job changes
     
     # OpenAI API
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # Another TTS endpoint, e.g. loadtest/fake_tts.py
     
     # TTS settings
     DEFAULT_VOICE = 'onyx'
@@ -32,14 +44,94 @@ class Config:
     RATELIMIT_STORAGE_URL = "memory://"
     
     # Audio storage
-    AUDIO_UPLOAD_FOLDER = os.path.join('static', 'audio')
+    AUDIO_UPLOAD_FOLDER = os.path.join('static', 'audio')  # Relative to the app package, served as static files
     MAX_CONTENT_LENGTH = 20 * 1024 * 1024  # 20MB limit for uploads
     
     # Text processing
     MAX_TEXT_LENGTH = 4096  # Maximum text length for TTS
+    CHUNK_MIN_LENGTH = 1000  # Characters in a chunk before a content-defined boundary may end it
+    CHUNK_BOUNDARY_ODDS = 8  # Past the minimum, about one sentence in this many ends a chunk
+    
+    # Stored article text compression
+    TEXT_COMPRESSION = os.getenv('TEXT_COMPRESSION', 'zlib')  # 'zlib', or 'zstd' with the zstandard package
+    TEXT_COMPRESSION_LEVEL = int(os.getenv('TEXT_COMPRESSION_LEVEL', 6))
+    TEXT_COMPRESSION_DICT = os.getenv('TEXT_COMPRESSION_DICT')  # Optional zstd dictionary file
     
     # User defaults
     GUEST_USER_LIMIT = 3  # Number of conversions for guests
+    
+    # RSS polling
+    RSS_POLL_CONCURRENCY = 32  # Feeds downloaded at once during a sweep
+    RSS_POLL_PER_HOST = 2  # Concurrent downloads from any one host
+    RSS_POLL_BATCH_SIZE = 50  # Polled feeds applied per database commit
+    RSS_FETCH_TIMEOUT = 15  # Seconds to connect to, and then wait on, a feed server
+    RSS_POLL_DEFAULT_INTERVAL = 30 * 60  # Seconds between polls until a feed's posting rate is known
+    RSS_POLL_MIN_INTERVAL = 15 * 60
+    RSS_POLL_MAX_INTERVAL = 24 * 60 * 60
+    RSS_POLL_ERROR_BACKOFF = 15 * 60  # Retry delay after one failure; doubles with each further failure
+    RSS_SCHEDULER_MAX_SLEEP = 60  # Longest the scheduler waits before looking for due feeds again
+
+    # WebSub push subscriptions; off unless the app's public URL is set
+    WEBSUB_CALLBACK_BASE_URL = os.getenv('WEBSUB_CALLBACK_BASE_URL')  # e.g. https://your-app-domain.com
+    WEBSUB_LEASE_SECONDS = 7 * 24 * 60 * 60  # Lease requested from hubs
+    WEBSUB_RENEW_MARGIN = 24 * 60 * 60  # Renew leases this long before they expire
+    WEBSUB_RETRY_INTERVAL = 60 * 60  # Seconds before an unverified subscription request is sent again
+    WEBSUB_POLL_INTERVAL = 12 * 60 * 60  # Fallback polling for feeds with a live push subscription
+    WEBSUB_MAX_ENTRIES = 20  # Entries taken from one pushed document
+
+    # Speculative extraction of new feed items, so a later conversion only runs TTS; off by default
+    PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'false').lower() == 'true'
+    PREFETCH_DAILY_BUDGET = int(os.getenv('PREFETCH_DAILY_BUDGET', 200))  # Prefetch jobs queued per 24 hours
+    PREFETCH_MAX_QUEUED = 20  # Prefetch jobs waiting at once
+    PREFETCH_MAX_AGE = 3 * 24 * 60 * 60  # Seconds after discovery that a feed item is still worth prefetching
+
+    # Podcast output
+    PODCAST_MAX_ITEMS = 100  # Newest episodes listed in each podcast feed
+    PODCAST_CACHE_TIMEOUT = 6 * 60 * 60  # Seconds before a cached podcast is rebuilt from the database
+    PODCAST_MAX_AGE = 15 * 60  # Cache-Control max-age sent to podcast apps
+
+    # RSS listings
+    RSS_PAGE_SIZE = 20  # Rows per page on feed and feed content listings
+    RSS_API_MAX_PAGE_SIZE = 100
+
+    # Background job queue
+    WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', 2))
+    WORKER_POLL_INTERVAL = 2  # Seconds to wait when the queue is empty
+    JOB_LEASE_SECONDS = 2 * 60  # Seconds a claimed job stays leased without a heartbeat
+    JOB_HEARTBEAT_INTERVAL = 30  # Seconds between lease renewals by a worker
+    JOB_REAP_INTERVAL = 60  # Seconds between sweeps for expired leases
+    JOB_MAX_ATTEMPTS = 3
+    JOB_QUEUE_MAX_DEPTH = int(os.getenv('JOB_QUEUE_MAX_DEPTH', 500))  # 0 disables the limit
+    JOB_RUNNING_LIMIT = int(os.getenv('JOB_RUNNING_LIMIT', 20))  # Jobs running at once across all workers, capped at pipeline capacity
+    JOB_RESERVED_INTERACTIVE = int(os.getenv('JOB_RESERVED_INTERACTIVE', 4))  # Running slots kept for web submissions
+    JOB_PRIORITY_AGING = 10 * 60  # Seconds of waiting that promote a job by one priority class
+    ADMISSION_MAX_BACKLOG = int(os.getenv('ADMISSION_MAX_BACKLOG', 20 * 60))  # Seconds of queued TTS work, 0 disables
+    ADMISSION_SAMPLE_SIZE = 50  # Recent jobs used to measure TTS throughput
+    ADMISSION_DEFAULT_JOB_CHARS = 8000  # Assumed job size until jobs have been measured
+    TTS_DEFAULT_CHARS_PER_SECOND = 250  # Assumed speed of one TTS request until measured
+    BATCH_MAX_URLS = int(os.getenv('BATCH_MAX_URLS', 100))  # URLs accepted per batch request
+
+    # Pipeline stage concurrency (threads per worker process)
+    PIPELINE_EXTRACT_WORKERS = int(os.getenv('PIPELINE_EXTRACT_WORKERS', 2))
+    PIPELINE_PROCESS_WORKERS = int(os.getenv('PIPELINE_PROCESS_WORKERS', 1))
+    PIPELINE_TTS_WORKERS = int(os.getenv('PIPELINE_TTS_WORKERS', 2))
+    PIPELINE_COMBINE_WORKERS = int(os.getenv('PIPELINE_COMBINE_WORKERS', 1))
+    PIPELINE_QUEUE_SIZE = 2  # Jobs buffered between consecutive stages
+    TTS_CHUNK_CONCURRENCY = 3  # Parallel TTS requests per job
+    # Chunk audio is kept here, one directory per content, so a reclaimed job can reuse it and a
+    # refreshed article only synthesizes the chunks whose text changed.
+    # Point it at shared, persistent storage if workers run on several hosts.
+    CHUNK_WORK_FOLDER = os.getenv('CHUNK_WORK_FOLDER', os.path.join(tempfile.gettempdir(), 'blog2audio_chunks'))
+    # Keep a finished job's chunk audio for the next refresh. Nothing cleans the folder up
+    # afterwards, so it grows with every converted article; off deletes it after each job.
+    KEEP_CHUNK_AUDIO = os.getenv('KEEP_CHUNK_AUDIO', 'false').lower() == 'true'
+
+    # Job status events
+    EVENTS_REDIS_URL = os.getenv('EVENTS_REDIS_URL')  # Pub/sub across processes; in-process when unset
+    STATUS_CACHE_TIMEOUT = 60 * 60  # Seconds to keep job status snapshots
+    SSE_KEEPALIVE_INTERVAL = 15  # Seconds between keep-alive comments on idle streams
+    SSE_POLL_INTERVAL = 2  # Snapshot re-check interval when events are in-process only
+    SSE_MAX_STREAM_SECONDS = 5 * 60
 
 
 class DevelopmentConfig(Config):
@@ -67,6 +159,9 @@ class ProductionConfig(Config):
     # Rate limiting with Redis in production
     RATELIMIT_STORAGE_URL = os.getenv('REDIS_URL')
     
+    # Job status events over Redis pub/sub in production
+    EVENTS_REDIS_URL = os.getenv('EVENTS_REDIS_URL', os.getenv('REDIS_URL'))
+    
     # More restrictive file upload settings
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'html'}
     
@@ -0,0 +1,46 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(config):
+    """
+    Build SQLAlchemy engine options for the configured database
+
+    Args:
+        config: Flask app config
+
+    Returns:
+        dict: Options for SQLALCHEMY_ENGINE_OPTIONS
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        # Wait for the write lock in Python too, not only in the busy_timeout pragma
+        return {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT'], 'check_same_thread': False}}
+
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,  # Drop connections the server closed while idle
+    }
+
+
+def configure_engine(engine, config):
+    """
+    Apply per-connection settings to a newly created engine
+
+    For SQLite this turns on WAL, so readers don't block the writer, relaxes
+    fsyncs to synchronous=NORMAL (safe with WAL) and makes writers wait for
+    the lock instead of failing with "database is locked".
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+        cursor.execute(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+        cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT'] * 1000)}")
+        cursor.close()
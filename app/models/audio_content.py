@@ -1,47 +1,114 @@
 from app import db
+from app.models.types import CompressedText
+from app.services.url_canonicalizer import canonicalize_url
 from datetime import datetime
+import hashlib
 import uuid
 import os
 
 class AudioContent(db.Model):
     """Model to store processed blog content and audio metadata"""
+    # Processing states
+    STATE_PENDING = 'pending'
+    STATE_PROCESSING = 'processing'
+    STATE_COMPLETED = 'completed'
+    STATE_ERROR = 'error'
+    STATES = (STATE_PENDING, STATE_PROCESSING, STATE_COMPLETED, STATE_ERROR)
+
+    __table_args__ = (
+        db.Index('ix_audio_content_url_voice', 'url', 'voice'),
+        db.Index('ix_audio_content_canonical_url_voice', 'canonical_url', 'voice'),
+        db.Index('ix_audio_content_feed_id_created_at', 'feed_id', 'created_at'),
+        db.Index('ix_audio_content_feed_id_feed_guid', 'feed_id', 'feed_guid'),
+        db.Index('ix_audio_content_state_created_at', 'state', 'created_at'),
+        # Keyset pagination of feed items, newest first
+        db.Index('ix_audio_content_feed_items', 'created_at', 'id',
+                 postgresql_where=db.text('feed_id IS NOT NULL'),
+                 sqlite_where=db.text('feed_id IS NOT NULL')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    url = db.Column(db.String(1024), index=True, nullable=False)
+    url = db.Column(db.String(1024), nullable=False)
+    canonical_url = db.Column(db.String(1024))  # Dedup form of url, or the page's rel=canonical link
     title = db.Column(db.String(255))
-    content_hash = db.Column(db.String(64), unique=True, index=True)
-    # Text content fields
-    original_text = db.Column(db.Text)
-    processed_text = db.Column(db.Text)
+    content_hash = db.Column(db.String(64), index=True)  # Not unique: the same page can be converted in several voices
+    # Text content fields, stored compressed and deferred so status and list queries don't load them
+    original_text = db.deferred(db.Column(CompressedText), group='text')
+    processed_text = db.deferred(db.Column(CompressedText), group='text')
+    chunk_plan = db.deferred(db.Column(db.JSON), group='text')  # TTS chunks of processed_text
+    prefetched_at = db.Column(db.DateTime)  # When the text was extracted ahead of a conversion
     word_count = db.Column(db.Integer)
     
     # Audio file fields
     filename = db.Column(db.String(255))
     file_path = db.Column(db.String(1024))
     duration = db.Column(db.Float)  # In seconds
+    file_size = db.Column(db.Integer)  # In bytes, for podcast enclosures
     voice = db.Column(db.String(50))
+    # One row per URL and voice; concurrent submitters share the claimed row
+    claim_key = db.Column(db.String(64), unique=True, index=True, nullable=True)
     # Add this to the AudioContent class
     feed_id = db.Column(db.Integer, db.ForeignKey('rss_feed.id', name='fk_audio_content_feed'), nullable=True)
 
     # feed_id = db.Column(db.Integer, db.ForeignKey('rss_feed.id'), nullable=True)
+    feed_guid = db.Column(db.String(1024))  # The feed entry's <guid>/<id>, which survives link changes
     # Processing metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     
+    # Per-stage timing records written by the pipeline
+    stage_timings = db.deferred(db.Column(db.JSON, nullable=True))
+    
     # Status tracking
-    is_processing = db.Column(db.Boolean, default=False)
-    is_processed = db.Column(db.Boolean, default=False)
+    state = db.Column(db.Enum(*STATES, name='content_state', native_enum=False, length=20),
+                      default=STATE_PENDING, nullable=False)
     error = db.Column(db.Text, nullable=True)
     
-    def __init__(self, url, original_text=None, title=None, user_id=None):
-        self.url = url
-        self.original_text = original_text
-        self.title = title
-        self.user_id = user_id
-        self.filename = f"{uuid.uuid4().hex}.mp3"
+    def __init__(self, url, original_text=None, title=None, user_id=None, voice=None, feed_id=None,
+                 feed_guid=None):
+        for key, value in self.new_row(url, original_text, title, user_id, voice, feed_id, feed_guid).items():
+            setattr(self, key, value)
+    
+    @classmethod
+    def new_row(cls, url, original_text=None, title=None, user_id=None, voice=None, feed_id=None,
+                feed_guid=None):
+        """
+        Return the column values of a new row, for bulk inserts that skip __init__
+        
+        Returns:
+            dict: Column name -> value
+        """
+        return {
+            'url': url,
+            'canonical_url': canonicalize_url(url),
+            'original_text': original_text,
+            'title': title,
+            'user_id': user_id,
+            'voice': voice,
+            'feed_id': feed_id,
+            'feed_guid': feed_guid,
+            'claim_key': cls.make_claim_key(url, voice) if voice else None,
+            'filename': f"{uuid.uuid4().hex}.mp3",
+            'state': cls.STATE_PENDING,
+        }
     
     def __repr__(self):
         return f'<AudioContent {self.title}>'
     
+    @staticmethod
+    def make_claim_key(url, voice):
+        """Return the single-flight key for a URL converted with a given voice"""
+        return hashlib.sha256(f"{canonicalize_url(url)}|{voice}".encode()).hexdigest()
+    
+    # Columns needed to show a content's status, link and audio without its text
+    SUMMARY_COLUMNS = ('id', 'url', 'title', 'filename', 'file_path', 'duration', 'voice', 'feed_id',
+                       'created_at', 'state', 'error')
+
+    @classmethod
+    def summary_only(cls):
+        """Loader option that restricts a query to SUMMARY_COLUMNS"""
+        return db.load_only(*(getattr(cls, name) for name in cls.SUMMARY_COLUMNS))
+
     @property
     def web_path(self):
         """Return the web-accessible path to the audio file"""
@@ -52,14 +119,12 @@ class AudioContent(db.Model):
     @property
     def status(self):
         """Return the current status of processing"""
-        if not self.is_processed and not self.is_processing:
-            return "pending"
-        elif self.is_processing:
-            return "processing"
-        elif self.is_processed and not self.error:
-            return "completed"
-        else:
-            return "error"
+        return self.state
+
+    @property
+    def is_processed(self):
+        """True once processing has finished, successfully or not"""
+        return self.state in (self.STATE_COMPLETED, self.STATE_ERROR)
 
 
 class User(db.Model):
@@ -0,0 +1,29 @@
+from app import db
+from datetime import datetime
+
+# Contents can belong to several batches when submissions overlap
+batch_items = db.Table(
+    'batch_item',
+    db.Column('batch_id', db.Integer, db.ForeignKey('conversion_batch.id', name='fk_batch_item_batch'),
+              primary_key=True),
+    db.Column('content_id', db.Integer, db.ForeignKey('audio_content.id', name='fk_batch_item_content'),
+              primary_key=True)
+)
+
+class ConversionBatch(db.Model):
+    """Model to group the contents submitted together through the batch API"""
+    id = db.Column(db.Integer, primary_key=True)
+    voice = db.Column(db.String(50))
+    item_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_conversion_batch_user'), nullable=True)
+
+    contents = db.relationship('AudioContent', secondary=batch_items, lazy='dynamic')
+
+    def __init__(self, voice=None, user_id=None):
+        self.voice = voice
+        self.user_id = user_id
+        self.item_count = 0
+
+    def __repr__(self):
+        return f'<ConversionBatch {self.id} items={self.item_count}>'
@@ -0,0 +1,56 @@
+from app import db
+from datetime import datetime
+
+class Job(db.Model):
+    """Model for a unit of background work stored in the persistent job queue"""
+    # Priority classes, lower runs first
+    PRIORITY_INTERACTIVE = 0  # Submitted from the web form
+    PRIORITY_API = 1
+    PRIORITY_BACKFILL = 2  # Feed items
+    PRIORITY_PREFETCH = 3  # Speculative extraction, never promoted by aging
+
+    # What the pipeline does with the job
+    KIND_CONVERT = 'convert'  # Full conversion to audio
+    KIND_PREFETCH = 'prefetch'  # Extract and process only, ahead of a likely conversion
+
+    __table_args__ = (
+        db.Index('ix_job_status_priority_created_at', 'status', 'priority', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('audio_content.id', name='fk_job_audio_content'),
+                           nullable=False, index=True)
+    voice = db.Column(db.String(50))
+    kind = db.Column(db.String(20), default=KIND_CONVERT, nullable=False)
+    priority = db.Column(db.Integer, default=PRIORITY_INTERACTIVE, nullable=False)
+    estimated_chars = db.Column(db.Integer)  # TTS cost, refined once the text is known
+
+    # Queue state: queued -> running -> done / failed
+    status = db.Column(db.String(20), default='queued', nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0)
+    worker_id = db.Column(db.String(64))
+    locked_until = db.Column(db.DateTime)  # Lease expiry for running jobs
+    heartbeat_at = db.Column(db.DateTime)  # Last lease renewal by the worker
+    reclaim_count = db.Column(db.Integer, default=0)  # Times the job was taken back from a dead worker
+    error = db.Column(db.Text, nullable=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    content = db.relationship('AudioContent', backref=db.backref('jobs', lazy='dynamic'))
+
+    def __init__(self, content_id, voice=None, priority=PRIORITY_INTERACTIVE, estimated_chars=None,
+                 kind=KIND_CONVERT):
+        self.content_id = content_id
+        self.voice = voice
+        self.kind = kind
+        self.priority = priority
+        self.estimated_chars = estimated_chars
+        self.status = 'queued'
+        self.attempts = 0
+        self.reclaim_count = 0
+
+    def __repr__(self):
+        return f'<Job {self.id} content={self.content_id} {self.status}>'
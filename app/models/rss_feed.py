@@ -3,6 +3,11 @@ from datetime import datetime
 
 class RssFeed(db.Model):
     """Model to store RSS feed subscriptions"""
+    __table_args__ = (
+        db.Index('ix_rss_feed_created_at_id', 'created_at', 'id'),
+        db.Index('ix_rss_feed_active_next_poll_at', 'is_active', 'next_poll_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     url = db.Column(db.String(1024), nullable=False, index=True)
     title = db.Column(db.String(255))
@@ -12,6 +17,21 @@ class RssFeed(db.Model):
     error_count = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
     
+    # Validators from the last full response, sent back so unchanged feeds answer 304
+    etag = db.Column(db.String(255))
+    modified = db.Column(db.String(64))  # Last-Modified header, as sent by the server
+    
+    # Polling schedule, see app.services.feed_schedule
+    poll_interval = db.Column(db.Integer)  # Seconds
+    next_poll_at = db.Column(db.DateTime)  # NULL means due now
+    
+    # WebSub push subscription, see app.services.websub
+    hub_url = db.Column(db.String(1024))
+    hub_topic = db.Column(db.String(1024))
+    hub_secret = db.Column(db.String(64))
+    hub_lease_expires = db.Column(db.DateTime)  # Set when the hub verifies the subscription
+    hub_requested_at = db.Column(db.DateTime)
+    
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
@@ -29,6 +49,11 @@ class RssFeed(db.Model):
     def __repr__(self):
         return f'<RssFeed {self.title or self.url}>'
     
+    @property
+    def is_pushed(self):
+        """True if a hub has a live subscription pushing this feed's posts"""
+        return bool(self.hub_lease_expires and self.hub_lease_expires > datetime.utcnow())
+    
     @property
     def status(self):
         """Return the current status of the feed"""
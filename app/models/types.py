@@ -0,0 +1,113 @@
+import zlib
+import logging
+import threading
+from app import db
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# The first byte of a stored value names its encoding, so rows written with
+# different settings can always be read back
+_RAW = b'\x00'
+_ZLIB = b'\x01'
+_ZSTD = b'\x02'
+
+_MIN_COMPRESS_BYTES = 64  # Shorter values grow when compressed
+
+_zstd_lock = threading.Lock()
+_zstd_dictionary = None
+
+
+def _load_zstd_dictionary():
+    """Load the shared zstd dictionary named by TEXT_COMPRESSION_DICT, once"""
+    global _zstd_dictionary
+    if _zstd_dictionary is None and Config.TEXT_COMPRESSION_DICT:
+        import zstandard
+        with _zstd_lock:
+            if _zstd_dictionary is None:
+                with open(Config.TEXT_COMPRESSION_DICT, 'rb') as f:
+                    _zstd_dictionary = zstandard.ZstdCompressionDict(f.read())
+    return _zstd_dictionary
+
+
+def compress_text(text, codec=None):
+    """
+    Encode text for storage in a CompressedText column
+
+    Args:
+        text (str): Text to encode
+        codec (str, optional): 'zstd' or 'zlib' (default: Config.TEXT_COMPRESSION)
+
+    Returns:
+        bytes: Header byte followed by the encoded text
+    """
+    data = text.encode('utf-8')
+    if len(data) < _MIN_COMPRESS_BYTES:
+        return _RAW + data
+
+    codec = codec or Config.TEXT_COMPRESSION
+    if codec == 'zstd':
+        # zstandard is optional; it is only needed when zstd is configured
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=Config.TEXT_COMPRESSION_LEVEL,
+                                              dict_data=_load_zstd_dictionary())
+        return _ZSTD + compressor.compress(data)
+    return _ZLIB + zlib.compress(data, Config.TEXT_COMPRESSION_LEVEL)
+
+
+def decompress_text(value):
+    """
+    Decode a value written by compress_text
+
+    Returns:
+        str: The original text
+    """
+    header, payload = value[:1], value[1:]
+    if header == _RAW:
+        data = payload
+    elif header == _ZLIB:
+        data = zlib.decompress(payload)
+    elif header == _ZSTD:
+        import zstandard
+        data = zstandard.ZstdDecompressor(dict_data=_load_zstd_dictionary()).decompress(payload)
+    else:
+        raise ValueError(f"Unknown text encoding {header!r}")
+    return data.decode('utf-8')
+
+
+def train_dictionary(samples, size=112640):
+    """
+    Train a zstd dictionary on sample texts
+
+    Args:
+        samples (list): Texts representative of the stored articles
+        size (int): Dictionary size in bytes
+
+    Returns:
+        bytes: The dictionary, ready to be written to TEXT_COMPRESSION_DICT
+    """
+    import zstandard
+    trained = zstandard.train_dictionary(size, [sample.encode('utf-8') for sample in samples])
+    return trained.as_bytes()
+
+
+class CompressedText(db.TypeDecorator):
+    """
+    Text column stored compressed as binary.
+
+    Values are compressed on write and decompressed on read, so models use
+    it exactly like db.Text. The codec is chosen by TEXT_COMPRESSION; old
+    values stay readable after the setting changes.
+    """
+    impl = db.LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(bytes(value))
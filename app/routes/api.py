@@ -1,12 +1,14 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, url_for, abort
 from app import db, limiter
 from app.models.audio_content import AudioContent
-from app.services.content_extractor import ContentExtractor
-from app.services.text_processor import TextProcessor
-from app.services.audio_converter import AudioConverter
-import threading
-import os
-from urllib.parse import urlparse
+from app.models.job import Job
+from app.models.batch import ConversionBatch, batch_items
+from app.services.job_queue import JobQueue, QueueFullError
+from app.services.job_events import JobEvents
+from app.services.admission import AdmissionControl
+from app.services.response_cache import ResponseCache
+from app.services.rss_service import RssService
+from app.services.url_canonicalizer import is_valid_url
 
 api_bp = Blueprint('api', __name__)
 
@@ -34,148 +36,295 @@ def convert_url():
     voice = data.get('voice', current_app.config['DEFAULT_VOICE'])
     
     # Validate URL
-    try:
-        parsed_url = urlparse(url)
-        if not all([parsed_url.scheme, parsed_url.netloc]):
-            raise ValueError("Invalid URL format")
-    except Exception:
+    if not is_valid_url(url):
         return jsonify({
             'status': 'error',
             'message': 'Invalid URL format'
         }), 400
     
-    # Check if we already have this URL processed
-    existing_content = AudioContent.query.filter_by(url=url).first()
-    if existing_content and existing_content.is_processed and not existing_content.error:
+    # Claim the URL, or attach to an existing conversion of it
+    try:
+        content, job = JobQueue().submit(url, voice, priority=Job.PRIORITY_API)
+    except QueueFullError as e:
+        return _queue_full_response(e)
+    
+    if content.state == AudioContent.STATE_COMPLETED:
         return jsonify({
             'status': 'success',
             'message': 'Content already processed',
-            'content_id': existing_content.id,
-            'audio_url': url_for('main.download_audio', content_id=existing_content.id, _external=True)
+            'content_id': content.id,
+            'audio_url': url_for('main.download_audio', content_id=content.id, _external=True)
         })
     
-    # Create new content entry
-    new_content = AudioContent(url=url)
-    db.session.add(new_content)
-    db.session.commit()
+    response = {
+        'status': 'processing',
+        'message': 'Content is being processed' if job else 'Content is already being processed',
+        'content_id': content.id,
+        'status_url': url_for('api.check_status', content_id=content.id, _external=True)
+    }
+    if job:
+        response['eta_seconds'] = AdmissionControl().eta(job)
+    return jsonify(response)
+
+@api_bp.route('/convert/batch', methods=['POST'])
+@limiter.limit("20 per hour")
+def convert_batch():
+    """
+    API endpoint to convert many URLs in one request
+    
+    Expected JSON:
+    {
+        "urls": ["https://example.com/post-1", "https://example.com/post-2"],
+        "voice": "onyx"  # Optional
+    }
+    """
+    data = request.get_json()
+    
+    if not data or not isinstance(data.get('urls'), list) or not data['urls']:
+        return jsonify({
+            'status': 'error',
+            'message': 'A list of URLs is required'
+        }), 400
+    
+    max_urls = current_app.config['BATCH_MAX_URLS']
+    if len(data['urls']) > max_urls:
+        return jsonify({
+            'status': 'error',
+            'message': f'At most {max_urls} URLs can be submitted at once'
+        }), 400
+    
+    voice = data.get('voice', current_app.config['DEFAULT_VOICE'])
+    
+    # Invalid URLs are reported back instead of failing the whole batch
+    urls, rejected = [], []
+    for url in data['urls']:
+        if is_valid_url(url):
+            urls.append(url)
+        else:
+            rejected.append(url)
+    
+    if not urls:
+        return jsonify({
+            'status': 'error',
+            'message': 'No valid URLs were submitted',
+            'rejected': rejected
+        }), 400
+    
+    try:
+        batch = JobQueue().submit_batch(urls, voice, priority=Job.PRIORITY_API)
+    except QueueFullError as e:
+        return _queue_full_response(e)
+    
+    last_job = Job.query.join(batch_items, batch_items.c.content_id == Job.content_id)\
+                        .filter(batch_items.c.batch_id == batch.id, Job.status == 'queued')\
+                        .order_by(Job.id.desc()).first()
+    
+    return jsonify({
+        'status': 'processing',
+        'batch_id': batch.id,
+        'eta_seconds': AdmissionControl().eta(last_job) if last_job else 0,
+        'item_count': batch.item_count,
+        'rejected': rejected,
+        'status_url': url_for('api.batch_status', batch_id=batch.id, _external=True)
+    }), 202
+
+@api_bp.route('/batch/<int:batch_id>', methods=['GET'])
+def batch_status(batch_id):
+    """
+    Check the progress of a batch conversion
+    
+    Items are read in one query that loads only their status columns.
+    """
+    batch = ConversionBatch.query.get_or_404(batch_id)
+    
+    rows = db.session.query(
+        AudioContent.id, AudioContent.url, AudioContent.title, AudioContent.state, AudioContent.error
+    ).join(batch_items, batch_items.c.content_id == AudioContent.id)\
+     .filter(batch_items.c.batch_id == batch_id)\
+     .order_by(AudioContent.id).all()
     
-    # Start background processing
-    thread = threading.Thread(
-        target=process_content_background,
-        args=(new_content.id, voice)
-    )
-    thread.daemon = True
-    thread.start()
+    counts = {'pending': 0, 'processing': 0, 'completed': 0, 'error': 0}
+    items = []
+    for row in rows:
+        status = row.state
+        counts[status] += 1
+        item = {
+            'content_id': row.id,
+            'url': row.url,
+            'status': status,
+        }
+        if status == 'completed':
+            item['title'] = row.title
+            item['audio_url'] = url_for('main.download_audio', content_id=row.id, _external=True)
+        elif status == 'error':
+            item['error'] = row.error
+        items.append(item)
+    
+    finished = counts['completed'] + counts['error']
+    return jsonify({
+        'batch_id': batch.id,
+        'voice': batch.voice,
+        'created_at': batch.created_at.isoformat(),
+        'counts': counts,
+        'progress': int(100 * finished / len(items)) if items else 100,
+        'is_complete': finished == len(items),
+        'items': items
+    })
+
+@api_bp.route('/refresh/<int:content_id>', methods=['POST'])
+@limiter.limit("10 per hour")
+def refresh_content(content_id):
+    """
+    API endpoint to convert a finished article again after its page changed
+    
+    Only the chunks whose text changed are synthesized again; the audio of
+    the rest is reused.
+    """
+    AudioContent.query.options(AudioContent.summary_only()).get_or_404(content_id)
+    
+    try:
+        job = JobQueue().refresh(content_id, priority=Job.PRIORITY_API)
+    except QueueFullError as e:
+        return _queue_full_response(e)
+    
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Only completed content can be refreshed'
+        }), 409
     
     return jsonify({
         'status': 'processing',
-        'message': 'Content is being processed',
-        'content_id': new_content.id,
-        'status_url': url_for('api.check_status', content_id=new_content.id, _external=True)
+        'message': 'Content is being refreshed',
+        'content_id': content_id,
+        'status_url': url_for('api.check_status', content_id=content_id, _external=True),
+        'eta_seconds': AdmissionControl().eta(job)
     })
 
 @api_bp.route('/status/<int:content_id>', methods=['GET'])
 def check_status(content_id):
     """
     Check the status of a conversion
+    
+    Served from the status snapshot; subscribe to /events/<content_id>
+    to be pushed updates instead of polling.
     """
-    content = AudioContent.query.get_or_404(content_id)
+    snapshot = JobEvents().snapshot(content_id)
+    if snapshot is None:
+        abort(404)
     
     response = {
-        'status': content.status,
-        'content_id': content.id,
+        'status': snapshot['status'],
+        'content_id': content_id,
     }
     
-    if content.is_processed:
-        if content.error:
-            response['error'] = content.error
+    if snapshot['is_processed']:
+        if snapshot.get('error'):
+            response['error'] = snapshot['error']
         else:
-            response['audio_url'] = url_for('main.download_audio', content_id=content.id, _external=True)
-            response['title'] = content.title
-            response['duration'] = content.duration
-            response['word_count'] = content.word_count
+            response['audio_url'] = url_for('main.download_audio', content_id=content_id, _external=True)
+            response['title'] = snapshot.get('title')
+            response['duration'] = snapshot.get('duration')
+            response['word_count'] = snapshot.get('word_count')
+    else:
+        response['progress'] = snapshot['progress']
     
     return jsonify(response)
 
-@api_bp.route('/voices', methods=['GET'])
-def get_voices():
+def _queue_full_response(error):
+    """Build the 503 response for a submission refused by the job queue"""
+    response = jsonify({
+        'status': 'error',
+        'message': str(error),
+        'retry_after': error.retry_after
+    })
+    response.status_code = 503
+    if error.retry_after:
+        response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+@api_bp.route('/feeds', methods=['GET'])
+def list_feeds():
     """
-    Get available voices
+    List RSS feeds, newest first
+    
+    Query parameters:
+        cursor: next_cursor from the previous page
+        limit: page size (default RSS_PAGE_SIZE, at most RSS_API_MAX_PAGE_SIZE)
     """
+    try:
+        feeds, next_cursor = RssService().list_feeds(request.args.get('cursor'), _page_size())
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
     return jsonify({
-        'voices': current_app.config['AVAILABLE_VOICES'],
-        'default': current_app.config['DEFAULT_VOICE']
+        'feeds': [{
+            'id': feed.id,
+            'url': feed.url,
+            'title': feed.title,
+            'status': feed.status,
+            'last_checked': feed.last_checked.isoformat() if feed.last_checked else None,
+            'created_at': feed.created_at.isoformat()
+        } for feed in feeds],
+        **_page_links('api.list_feeds', next_cursor)
     })
 
-def process_content_background(content_id, voice):
-    """
-    Background task to process content
-    """
-    # Import the app outside of the function to avoid circular imports
-    from run import app
-    
-    # Use the imported app to create a context
-    with app.app_context():
-        content = AudioContent.query.get(content_id)
-        if not content:
-            return
-        
-        content.is_processing = True
-        db.session.commit()
-        
-        try:
-            # Step 1: Extract content
-            extractor = ContentExtractor(content.url)
-            title, extracted_text = extractor.extract()
-            
-            if not extracted_text:
-                raise ValueError("Could not extract content from the URL")
-            
-            content.title = title
-            content.original_text = extracted_text
-            content.content_hash = extractor.get_content_hash()
-            db.session.commit()
-            
-            # Step 2: Process text
-            processor = TextProcessor(extracted_text, title)
-            processed_text = processor.process()
-            content.processed_text = processed_text
-            content.word_count = processor.word_count
-            db.session.commit()
-            
-            # Step 3: Convert to audio
-            converter = AudioConverter()
-            
-            if len(processor.chunks) > 1:
-                audio_path = converter.convert_long_text(
-                    processor.chunks,
-                    voice=voice
-                )
-            else:
-                audio_path = converter.convert_text(
-                    processed_text,
-                    voice=voice
-                )
-            
-            # Get relative path for database storage
-            rel_path = os.path.relpath(
-                audio_path,
-                os.path.join(current_app.root_path)
-            )
-            
-            # Update database record
-            # content.file_path = audio_path
-            rel_path = os.path.join('static', 'audio', os.path.basename(audio_path))
-            content.file_path = rel_path  # Store the relative path for web access
-            content.voice = voice
-            content.duration = converter.get_audio_duration(audio_path)
-            content.is_processed = True
-            content.is_processing = False
-            db.session.commit()
-            
-        except Exception as e:
-            content.error = str(e)
-            content.is_processed = True
-            content.is_processing = False
-            db.session.commit()
-            current_app.logger.error(f"Error processing content: {str(e)}")
\ No newline at end of file
+@api_bp.route('/feeds/content', methods=['GET'])
+def list_feed_content():
+    """
+    List content from RSS feeds, newest first
+    
+    Query parameters:
+        cursor: next_cursor from the previous page
+        limit: page size (default RSS_PAGE_SIZE, at most RSS_API_MAX_PAGE_SIZE)
+    """
+    try:
+        contents, next_cursor = RssService().list_feed_content(request.args.get('cursor'), _page_size())
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    items = []
+    for content in contents:
+        item = {
+            'content_id': content.id,
+            'url': content.url,
+            'title': content.title,
+            'feed_id': content.feed_id,
+            'feed_title': content.feed.title if content.feed else None,
+            'status': content.status,
+            'created_at': content.created_at.isoformat()
+        }
+        if content.status == AudioContent.STATE_COMPLETED:
+            item['audio_url'] = url_for('main.download_audio', content_id=content.id, _external=True)
+            item['duration'] = content.duration
+        items.append(item)
+    
+    return jsonify({'items': items, **_page_links('api.list_feed_content', next_cursor)})
+
+def _page_size():
+    """Read the limit query parameter, bounded by RSS_API_MAX_PAGE_SIZE"""
+    limit = request.args.get('limit', current_app.config['RSS_PAGE_SIZE'], type=int)
+    return max(1, min(limit, current_app.config['RSS_API_MAX_PAGE_SIZE']))
+
+def _page_links(endpoint, next_cursor):
+    """Cursor fields shared by paginated responses"""
+    return {
+        'next_cursor': next_cursor,
+        'next_url': url_for(endpoint, cursor=next_cursor, limit=request.args.get('limit'), _external=True)
+                    if next_cursor else None
+    }
+
+@api_bp.route('/voices', methods=['GET'])
+def get_voices():
+    """
+    Get available voices
+    """
+    voices_cache = ResponseCache('voices')
+    voices = voices_cache.get('all')
+    if voices is None:
+        voices = {
+            'voices': current_app.config['AVAILABLE_VOICES'],
+            'default': current_app.config['DEFAULT_VOICE']
+        }
+        voices_cache.set('all', voices)
+    return jsonify(voices)
@@ -1,14 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, send_file, Response, abort, stream_with_context
 from app import db, cache, limiter
 from app.models.audio_content import AudioContent, User
-from app.services.content_extractor import ContentExtractor
-from app.services.text_processor import TextProcessor
-from app.services.audio_converter import AudioConverter
-from urllib.parse import urlparse
+from app.models.job import Job
+from app.services.job_queue import JobQueue, QueueFullError
+from app.services.metrics import render_metrics
+from app.services.job_events import JobEvents, stream_status
+from app.services.response_cache import ResponseCache
+from app.services.url_canonicalizer import is_valid_url
 import os
 import hashlib
 from werkzeug.utils import secure_filename
-import threading
 
 main_bp = Blueprint('main', __name__)
 
@@ -29,38 +30,26 @@ def process_url():
         return redirect(url_for('main.index'))
     
     # Validate URL
-    try:
-        parsed_url = urlparse(url)
-        if not all([parsed_url.scheme, parsed_url.netloc]):
-            raise ValueError("Invalid URL format")
-    except Exception:
+    if not is_valid_url(url):
         flash('Please enter a valid URL', 'error')
         return redirect(url_for('main.index'))
     
-    # Check if we already have this URL processed
-    existing_content = AudioContent.query.filter_by(url=url).first()
-    if existing_content and existing_content.is_processed:
-        return redirect(url_for('main.result', content_id=existing_content.id))
-    
-    # Create new content entry
-    new_content = AudioContent(url=url)
-    db.session.add(new_content)
-    db.session.commit()
+    # Claim the URL, or attach to an existing conversion of it
+    try:
+        content, job = JobQueue().submit(url, voice, priority=Job.PRIORITY_INTERACTIVE)
+    except QueueFullError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('main.index'))
     
-    # Start background processing
-    thread = threading.Thread(
-        target=process_content_background,
-        args=(new_content.id, voice)
-    )
-    thread.daemon = True
-    thread.start()
+    if content.state == AudioContent.STATE_COMPLETED:
+        return redirect(url_for('main.result', content_id=content.id))
     
-    return redirect(url_for('main.processing', content_id=new_content.id))
+    return redirect(url_for('main.processing', content_id=content.id))
 
 @main_bp.route('/processing/<int:content_id>')
 def processing(content_id):
     """Show processing status"""
-    content = AudioContent.query.get_or_404(content_id)
+    content = AudioContent.query.options(AudioContent.summary_only()).get_or_404(content_id)
     
     if content.is_processed:
         return redirect(url_for('main.result', content_id=content_id))
@@ -70,18 +59,45 @@ def processing(content_id):
 @main_bp.route('/status/<int:content_id>')
 def status(content_id):
     """AJAX endpoint to check processing status"""
-    content = AudioContent.query.get_or_404(content_id)
+    snapshot = JobEvents().snapshot(content_id)
+    if snapshot is None:
+        abort(404)
     
     return jsonify({
-        'status': content.status,
-        'error': content.error,
-        'is_processed': content.is_processed
+        'status': snapshot['status'],
+        'error': snapshot.get('error'),
+        'is_processed': snapshot['is_processed'],
+        'stage': snapshot.get('stage'),
+        'progress': snapshot['progress'],
+        'eta': snapshot.get('eta')
     })
 
+@main_bp.route('/events/<int:content_id>')
+@limiter.exempt
+def events(content_id):
+    """Server-Sent Events stream of processing status"""
+    snapshot = JobEvents().snapshot(content_id)
+    if snapshot is None:
+        abort(404)
+    # Don't hold a pooled connection for the life of the stream
+    db.session.remove()
+    
+    return Response(
+        stream_with_context(stream_status(content_id, snapshot)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @main_bp.route('/result/<int:content_id>')
 def result(content_id):
     """Show result page with processed audio"""
-    content = AudioContent.query.get_or_404(content_id)
+    # Finished results don't change, so popular pages are rendered once
+    page_cache = ResponseCache('result')
+    page = page_cache.get(content_id)
+    if page is not None:
+        return page
+    
+    content = AudioContent.query.options(db.undefer_group('text')).get_or_404(content_id)
     
     if not content.is_processed:
         return redirect(url_for('main.processing', content_id=content_id))
@@ -90,12 +106,29 @@ def result(content_id):
         flash(f"Error processing content: {content.error}", 'error')
         return redirect(url_for('main.index'))
     
-    return render_template('result.html', content=content)
+    page = render_template('result.html', content=content)
+    page_cache.set(content_id, page)
+    return page
+
+@main_bp.route('/refresh/<int:content_id>', methods=['POST'])
+@limiter.limit("5 per minute")
+def refresh(content_id):
+    """Convert a finished article again after its page changed"""
+    AudioContent.query.options(AudioContent.summary_only()).get_or_404(content_id)
+    
+    # Only the parts of the text that changed are synthesized again
+    try:
+        JobQueue().refresh(content_id, priority=Job.PRIORITY_INTERACTIVE)
+    except QueueFullError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('main.result', content_id=content_id))
+    
+    return redirect(url_for('main.processing', content_id=content_id))
 
 @main_bp.route('/download/<int:content_id>')
 def download_audio(content_id):
     """Download the audio file"""
-    content = AudioContent.query.get_or_404(content_id)
+    content = AudioContent.query.options(AudioContent.summary_only()).get_or_404(content_id)
     
     if not content.is_processed or not content.file_path or content.error:
         flash("Audio file is not available", 'error')
@@ -108,76 +141,9 @@ def download_audio(content_id):
         mimetype='audio/mpeg'
     )
 
-def process_content_background(content_id, voice, app=None):
-    """
-    Background task to process content
-    """
-    # Import the app outside of the function to avoid circular imports
-    if app is None:
-        from run import app
-
-    # Use the imported app to create a context
-    with app.app_context():
-        content = AudioContent.query.get(content_id)
-        if not content:
-            return
-        
-        content.is_processing = True
-        db.session.commit()
-        
-        try:
-            # Step 1: Extract content
-            extractor = ContentExtractor(content.url)
-            title, extracted_text = extractor.extract()
-            
-            if not extracted_text:
-                raise ValueError("Could not extract content from the URL")
-            
-            content.title = title
-            content.original_text = extracted_text
-            content.content_hash = extractor.get_content_hash()
-            db.session.commit()
-            
-            # Step 2: Process text
-            processor = TextProcessor(extracted_text, title)
-            processed_text = processor.process()
-            content.processed_text = processed_text
-            content.word_count = processor.word_count
-            db.session.commit()
-            
-            # Step 3: Convert to audio
-            converter = AudioConverter()
-            
-            if len(processor.chunks) > 1:
-                audio_path = converter.convert_long_text(
-                    processor.chunks,
-                    voice=voice
-                )
-            else:
-                audio_path = converter.convert_text(
-                    processed_text,
-                    voice=voice
-                )
-            
-            # Get relative path for database storage
-            rel_path = os.path.relpath(
-                audio_path,
-                os.path.join(current_app.root_path)
-            )
-            
-            # Update database record
-            # content.file_path = audio_path
-            rel_path = os.path.join('static', 'audio', os.path.basename(audio_path))
-            content.file_path = rel_path  # Store the relative path for web access
-            content.voice = voice
-            content.duration = converter.get_audio_duration(audio_path)
-            content.is_processed = True
-            content.is_processing = False
-            db.session.commit()
-            
-        except Exception as e:
-            content.error = str(e)
-            content.is_processed = True
-            content.is_processing = False
-            db.session.commit()
-            current_app.logger.error(f"Error processing content: {str(e)}")
\ No newline at end of file
+@main_bp.route('/metrics')
+@limiter.exempt
+def metrics():
+    """Prometheus metrics for pipeline stage timings"""
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
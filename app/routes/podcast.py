@@ -0,0 +1,31 @@
+from flask import Blueprint, Response, request, abort, current_app
+from app import limiter
+from app.services.podcast_feed import PodcastFeed, BASE_URL_TOKEN
+
+podcast_bp = Blueprint('podcast', __name__, url_prefix='/podcast')
+
+@podcast_bp.route('/feeds/<int:feed_id>.xml')
+@limiter.exempt
+def source_feed(feed_id):
+    """Podcast of the audio generated from one RSS feed"""
+    return _podcast_response(PodcastFeed('feed', feed_id))
+
+@podcast_bp.route('/users/<int:user_id>.xml')
+@limiter.exempt
+def user_feed(user_id):
+    """Podcast of the audio converted by one user"""
+    return _podcast_response(PodcastFeed('user', user_id))
+
+def _podcast_response(podcast):
+    """Serve a cached podcast document, answering 304 when the client's copy is current"""
+    document = podcast.document()
+    if document is None:
+        abort(404)
+    
+    response = Response(document['body'].replace(BASE_URL_TOKEN, request.url_root.rstrip('/')),
+                        mimetype='application/rss+xml')
+    response.set_etag(document['etag'])
+    response.last_modified = document['last_modified']
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['PODCAST_MAX_AGE']
+    return response.make_conditional(request)
@@ -1,17 +1,23 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, abort
 from app import db, limiter
 from app.models.audio_content import AudioContent
 from app.models.rss_feed import RssFeed
+from app.models.job import Job
 from app.services.rss_service import RssService
-from app.routes.main import process_content_background
+from app.services.job_queue import JobQueue, QueueFullError
+from app.services.websub import WebSubManager
 
 rss_bp = Blueprint('rss', __name__, url_prefix='/rss')
 
 @rss_bp.route('/feeds', methods=['GET'])
 def list_feeds():
     """List user's RSS feeds"""
-    feeds = RssFeed.query.all()  # In the future, filter by user
-    return render_template('rss/feeds.html', feeds=feeds)
+    # In the future, filter by user
+    try:
+        feeds, next_cursor = RssService().list_feeds(request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+    return render_template('rss/feeds.html', feeds=feeds, next_cursor=next_cursor)
 
 @rss_bp.route('/feeds/add', methods=['GET', 'POST'])
 @limiter.limit("5 per minute")
@@ -63,7 +69,11 @@ def toggle_feed(feed_id):
     """Toggle active status of a feed"""
     feed = RssFeed.query.get_or_404(feed_id)
     feed.is_active = not feed.is_active
+    if feed.is_active:
+        feed.next_poll_at = None  # Poll (and resubscribe) on the scheduler's next pass
     db.session.commit()
+    if not feed.is_active:
+        WebSubManager().unsubscribe(feed)
     
     status = 'activated' if feed.is_active else 'deactivated'
     flash(f'Feed {feed.title or feed.url} has been {status}', 'success')
@@ -76,6 +86,7 @@ def delete_feed(feed_id):
     feed = RssFeed.query.get_or_404(feed_id)
     title = feed.title or feed.url
     
+    WebSubManager().unsubscribe(feed)
     db.session.delete(feed)
     db.session.commit()
     
@@ -85,32 +96,34 @@ def delete_feed(feed_id):
 @rss_bp.route('/content', methods=['GET'])
 def feed_content():
     """Display all content from user's feeds"""
-    # Get all content from RSS feeds, ordered by newest first
-    contents = AudioContent.query.filter(AudioContent.feed_id.isnot(None))\
-                              .order_by(AudioContent.created_at.desc())\
-                              .all()
+    # One page of content from RSS feeds, ordered by newest first
+    try:
+        contents, next_cursor = RssService().list_feed_content(request.args.get('cursor'))
+    except ValueError:
+        abort(400)
     
-    return render_template('rss/feed_content.html', contents=contents)
+    return render_template('rss/feed_content.html', contents=contents, next_cursor=next_cursor)
 
 @rss_bp.route('/content/<int:content_id>/process', methods=['POST'])
 def process_content(content_id):
     """Process a specific content item"""
-    content = AudioContent.query.get_or_404(content_id)
+    content = AudioContent.query.options(AudioContent.summary_only()).get_or_404(content_id)
     
-    # Start processing in background
-    from app.routes.main import process_content_background
-    from run import app
+    voice = content.voice or current_app.config['DEFAULT_VOICE']
     
-    voice = 'onyx'  # Default voice or get from user preferences
+    # Hand the work to the background workers
+    try:
+        queue = JobQueue()
+        if content.state in (AudioContent.STATE_PENDING, AudioContent.STATE_ERROR):
+            queue.check_capacity()
+        job = queue.start(content.id, voice, priority=Job.PRIORITY_BACKFILL)
+    except QueueFullError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('rss.feed_content'))
     
-    # Use a thread to process in background
-    import threading
-    thread = threading.Thread(
-        target=process_content_background,
-        args=(content.id, voice, app)
-    )
-    thread.daemon = True
-    thread.start()
+    if not job:
+        flash('This content is already being processed.', 'info')
+        return redirect(url_for('rss.feed_content'))
     
     flash('Content is being processed. Please check back soon.', 'info')
     return redirect(url_for('rss.feed_content'))
\ No newline at end of file
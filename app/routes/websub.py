@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+import logging
+import feedparser
+from flask import Blueprint, request, abort, current_app
+from app import db, limiter
+from app.models.rss_feed import RssFeed
+from app.services.rss_service import RssService
+from app.services.websub import verify_signature
+
+logger = logging.getLogger(__name__)
+
+websub_bp = Blueprint('websub', __name__, url_prefix='/websub')
+
+@websub_bp.route('/callback/<int:feed_id>', methods=['GET'])
+@limiter.exempt
+def verify_intent(feed_id):
+    """Answer a hub's verification of a subscribe or unsubscribe request"""
+    mode = request.args.get('hub.mode')
+    challenge = request.args.get('hub.challenge')
+    feed = RssFeed.query.get(feed_id)
+    
+    if mode == 'denied':
+        if feed:
+            logger.warning(f"WebSub hub denied subscription for {feed.url}: {request.args.get('hub.reason')}")
+            feed.hub_lease_expires = None
+            db.session.commit()
+        return '', 200
+    
+    if not challenge:
+        abort(400)
+    
+    if mode == 'subscribe':
+        # Only confirm subscriptions to the topic we asked for, for feeds we still follow
+        if (feed is None or not feed.is_active or not feed.hub_url
+                or request.args.get('hub.topic') != (feed.hub_topic or feed.url)):
+            abort(404)
+        lease_seconds = request.args.get('hub.lease_seconds', type=int) or current_app.config['WEBSUB_LEASE_SECONDS']
+        feed.hub_lease_expires = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        db.session.commit()
+        return challenge, 200, {'Content-Type': 'text/plain'}
+    
+    if mode == 'unsubscribe':
+        # Confirm only unsubscriptions we asked for: the feed is gone, paused or has no lease
+        if feed is None or not feed.is_active or feed.hub_lease_expires is None:
+            return challenge, 200, {'Content-Type': 'text/plain'}
+        abort(404)
+    
+    abort(400)
+
+@websub_bp.route('/callback/<int:feed_id>', methods=['POST'])
+@limiter.exempt
+def receive(feed_id):
+    """Ingest a feed document pushed by a hub"""
+    feed = RssFeed.query.get(feed_id)
+    if feed is None or not feed.is_active:
+        return '', 410  # Tells the hub to drop the subscription
+    
+    body = request.get_data()
+    if not verify_signature(feed.hub_secret, body, request.headers.get('X-Hub-Signature')):
+        # Acknowledged so the hub doesn't retry, but not trusted
+        logger.warning(f"Ignoring WebSub push with a bad signature for {feed.url}")
+        return '', 202
+    
+    feed_data = feedparser.parse(body)
+    try:
+        new_rows = RssService().ingest_entries(feed, feed_data.entries, current_app.config['WEBSUB_MAX_ENTRIES'])
+        feed.last_updated = datetime.utcnow()
+        db.session.commit()
+    except Exception as e:
+        logger.error(f"Error ingesting WebSub push for {feed.url}: {str(e)}")
+        db.session.rollback()
+        return '', 500  # The hub retries the delivery
+    
+    logger.info(f"WebSub push for {feed.url}: {len(new_rows)} new items")
+    return '', 202
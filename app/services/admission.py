@@ -0,0 +1,132 @@
+import math
+import logging
+from flask import current_app
+from sqlalchemy import func
+from app import db, cache
+from app.models.audio_content import AudioContent
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+_STATS_CACHE_KEY = 'admission-stats'
+
+
+def pipeline_capacity(config):
+    """Return how many jobs one worker process's pipeline can hold at once"""
+    return (config['PIPELINE_EXTRACT_WORKERS'] + config['PIPELINE_PROCESS_WORKERS']
+            + config['PIPELINE_TTS_WORKERS'] + config['PIPELINE_COMBINE_WORKERS']
+            + config['PIPELINE_QUEUE_SIZE'])
+
+
+class AdmissionControl:
+    """
+    Estimates the TTS work waiting in the queue and how long it will take.
+
+    A job's cost is the number of characters it sends to the TTS provider.
+    Throughput is measured from the tts_chunk timings of recently completed
+    jobs and multiplied by the number of TTS requests the workers can have
+    in flight. New work is refused once the backlog would take longer than
+    ADMISSION_MAX_BACKLOG seconds to clear.
+    """
+
+    def __init__(self):
+        config = current_app.config
+        self.max_backlog = config['ADMISSION_MAX_BACKLOG']
+        self.sample_size = config['ADMISSION_SAMPLE_SIZE']
+        self.default_job_chars = config['ADMISSION_DEFAULT_JOB_CHARS']
+        self.default_chars_per_second = config['TTS_DEFAULT_CHARS_PER_SECOND']
+        self.tts_lanes = (config['WORKER_PROCESSES'] * config['PIPELINE_TTS_WORKERS']
+                          * config['TTS_CHUNK_CONCURRENCY'])
+
+    def stats(self):
+        """
+        Return throughput figures observed on recently completed jobs
+
+        Returns:
+            dict: chars_per_second (per TTS request) and job_chars (average
+                  characters per job); defaults are used until jobs have run
+        """
+        stats = cache.get(_STATS_CACHE_KEY)
+        if stats:
+            return stats
+
+        rows = db.session.query(AudioContent.stage_timings).filter(
+            AudioContent.state == AudioContent.STATE_COMPLETED,
+            AudioContent.stage_timings.isnot(None)
+        ).order_by(AudioContent.created_at.desc()).limit(self.sample_size).all()
+
+        chars, seconds, jobs = 0, 0.0, 0
+        for (timings,) in rows:
+            records = [record for record in timings if record['stage'] == 'tts_chunk' and record.get('chars')]
+            if not records:
+                continue
+            jobs += 1
+            chars += sum(record['chars'] for record in records)
+            seconds += sum(record['seconds'] for record in records)
+
+        stats = {
+            'chars_per_second': chars / seconds if seconds else self.default_chars_per_second,
+            'job_chars': int(chars / jobs) if jobs else self.default_job_chars,
+        }
+        cache.set(_STATS_CACHE_KEY, stats, timeout=60)
+        return stats
+
+    def throughput(self):
+        """Return the characters per second all workers can synthesize together"""
+        return self.stats()['chars_per_second'] * max(self.tts_lanes, 1)
+
+    def estimate_job_chars(self):
+        """Return the expected cost of a job whose text has not been extracted yet"""
+        return self.stats()['job_chars']
+
+    def backlog_chars(self):
+        """Return the estimated characters still to synthesize for queued and running jobs"""
+        return db.session.query(func.coalesce(func.sum(Job.estimated_chars), 0))\
+                         .filter(Job.status.in_(('queued', 'running'))).scalar()
+
+    def retry_after(self, jobs=1):
+        """
+        Check whether the backlog has room for more jobs
+
+        Args:
+            jobs (int): Number of jobs about to be queued
+
+        Returns:
+            int: Seconds until the backlog is expected to have room, or 0 if
+                 the jobs can be admitted now
+        """
+        if not self.max_backlog:
+            return 0
+
+        chars = self.backlog_chars() + jobs * self.estimate_job_chars()
+        backlog_seconds = chars / self.throughput()
+        if backlog_seconds <= self.max_backlog:
+            return 0
+
+        logger.warning(f"Refusing {jobs} job(s): backlog of {int(backlog_seconds)}s "
+                       f"exceeds {self.max_backlog}s")
+        return math.ceil(backlog_seconds - self.max_backlog)
+
+    def eta(self, job):
+        """
+        Estimate the seconds until a queued job finishes
+
+        Work ahead of the job is everything running plus queued jobs of the
+        same or a more urgent priority class that were queued before it.
+
+        Args:
+            job (Job): The queued job
+
+        Returns:
+            int: Estimated seconds until the job completes
+        """
+        ahead = db.session.query(func.coalesce(func.sum(Job.estimated_chars), 0)).filter(
+            db.or_(
+                Job.status == 'running',
+                db.and_(Job.status == 'queued',
+                        Job.priority <= job.priority,
+                        Job.id < job.id)
+            )
+        ).scalar()
+        chars = ahead + (job.estimated_chars or self.estimate_job_chars())
+        return math.ceil(chars / self.throughput())
@@ -1,12 +1,15 @@
 import os
+import hashlib
 import logging
 from openai import OpenAI
 from pydub import AudioSegment
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import tempfile
+import shutil
 import time
 
 from app.config import Config
+from app.services.metrics import StageTimings, TTS_CHUNK_CHARS
 from flask import current_app
 
 logger = logging.getLogger(__name__)
@@ -17,11 +20,13 @@ class AudioConverter:
     with support for long texts and error handling
     """
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, chunk_concurrency=None, timings=None, base_url=None):
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = OpenAI(api_key=self.api_key, base_url=base_url or Config.OPENAI_BASE_URL)
         self.default_voice = Config.DEFAULT_VOICE
         self.available_voices = Config.AVAILABLE_VOICES
+        self.chunk_concurrency = chunk_concurrency or Config.TTS_CHUNK_CONCURRENCY
+        self.timings = timings or StageTimings()
     
     def convert_text(self, text, voice=None, output_path=None):
         """
@@ -46,20 +51,16 @@ class AudioConverter:
         try:
             logger.info(f"Converting text with {len(text)} characters using voice: {voice}")
             
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                voice=voice,
-                input=text
-            )
+            with self.timings.time('tts_chunk', chars=len(text)) as record:
+                response = self.client.audio.speech.create(
+                    model="tts-1",
+                    voice=voice,
+                    input=text
+                )
+                record['bytes'] = len(response.content)
             
             # Create output path if not provided
-            if not output_path:
-                folder = os.path.join(current_app.root_path, Config.AUDIO_UPLOAD_FOLDER)
-                os.makedirs(folder, exist_ok=True)
-                
-                # Generate a unique filename
-                timestamp = int(time.time())
-                output_path = os.path.join(folder, f"audio_{timestamp}.mp3")
+            output_path = output_path or self._default_output_path()
             
             # Write response to file
             with open(output_path, "wb") as audio_file:
@@ -88,50 +89,101 @@ class AudioConverter:
         
         # Create a temp directory for chunk processing
         with tempfile.TemporaryDirectory() as temp_dir:
-            logger.info(f"Processing {len(text_chunks)} text chunks")
-            temp_files = []
-            
-            # Convert each chunk in parallel
-            with ThreadPoolExecutor(max_workers=3) as executor:
-                futures = []
-                
-                for i, chunk in enumerate(text_chunks):
-                    chunk_path = os.path.join(temp_dir, f"chunk_{i}.mp3")
-                    temp_files.append(chunk_path)
-                    
-                    # Submit chunk conversion task
-                    future = executor.submit(
-                        self._convert_chunk, 
-                        chunk, 
-                        voice, 
-                        chunk_path
-                    )
-                    futures.append(future)
-                
-                # Wait for all conversions to complete
-                for future in futures:
-                    future.result()  # This will raise any exceptions from the thread
-            
-            # Combine audio files
-            combined = self._combine_audio_files(temp_files)
+            chunk_paths = self.synthesize_chunks(text_chunks, voice, temp_dir)
+            return self.combine_chunks(chunk_paths, output_path)
+    
+    def synthesize_chunks(self, text_chunks, voice, work_dir, on_progress=None):
+        """
+        Convert each text chunk to its own audio file
+        
+        Args:
+            text_chunks (list): List of text chunks
+            voice (str): Voice to use
+            work_dir (str): Directory to write chunk audio files to
+            on_progress (callable): Called as on_progress(done, total) in the
+                calling thread after each chunk finishes
             
-            # Create output path if not provided
-            if not output_path:
-                folder = os.path.join(current_app.root_path, Config.AUDIO_UPLOAD_FOLDER)
-                os.makedirs(folder, exist_ok=True)
-                
-                # Generate a unique filename
-                timestamp = int(time.time())
-                output_path = os.path.join(folder, f"audio_{timestamp}.mp3")
+        Returns:
+            list: Paths to the chunk audio files, in order
+        """
+        if not text_chunks:
+            raise ValueError("No text chunks provided for conversion")
+        
+        logger.info(f"Processing {len(text_chunks)} text chunks")
+        # Files are named by the voice and chunk text alone, so audio from an interrupted run, or
+        # the unchanged chunks of an earlier version of the article, is found again and reused
+        chunk_paths = [
+            os.path.join(work_dir, f"chunk_{hashlib.sha1(f'{voice}|{chunk}'.encode()).hexdigest()[:16]}.mp3")
+            for chunk in text_chunks
+        ]
+        pending = {chunk_path: chunk for chunk, chunk_path in zip(text_chunks, chunk_paths)
+                   if not os.path.exists(chunk_path)}
+        reused = len(text_chunks) - len(pending)
+        if reused:
+            logger.info(f"Reusing {reused} chunk(s) from an earlier run in {work_dir}")
+        synthesized_chars = sum(len(chunk) for chunk in pending.values())
+        TTS_CHUNK_CHARS.labels('synthesized').inc(synthesized_chars)
+        TTS_CHUNK_CHARS.labels('reused').inc(sum(len(chunk) for chunk in text_chunks) - synthesized_chars)
+        
+        # Convert each chunk in parallel
+        with ThreadPoolExecutor(max_workers=self.chunk_concurrency) as executor:
+            futures = [
+                executor.submit(self._convert_chunk, chunk, voice, chunk_path)
+                for chunk_path, chunk in pending.items()
+            ]
             
-            # Save combined audio
-            combined.export(output_path, format="mp3")
+            # Wait for all conversions to complete
+            for done, future in enumerate(as_completed(futures), start=reused + 1):
+                future.result()  # This will raise any exceptions from the thread
+                if on_progress:
+                    on_progress(done, len(text_chunks))
+        
+        return chunk_paths
+    
+    def combine_chunks(self, chunk_paths, output_path=None):
+        """
+        Combine chunk audio files into the final audio file
+        
+        Args:
+            chunk_paths (list): Paths to chunk audio files, in order
+            output_path (str): Path to save final audio file
             
+        Returns:
+            str: Path to saved audio file
+        """
+        output_path = output_path or self._default_output_path()
+        
+        # A single chunk needs no re-encoding
+        if len(chunk_paths) == 1:
+            shutil.copyfile(chunk_paths[0], output_path)
             return output_path
+        
+        chunk_bytes = sum(os.path.getsize(path) for path in chunk_paths)
+        with self.timings.time('combine_audio', bytes=chunk_bytes):
+            combined = self._combine_audio_files(chunk_paths)
+        
+        with self.timings.time('export') as record:
+            combined.export(output_path, format="mp3")
+            record['bytes'] = os.path.getsize(output_path)
+        
+        return output_path
+    
+    def _default_output_path(self):
+        """Generate a unique path in the audio upload folder"""
+        folder = os.path.join(current_app.root_path, current_app.config['AUDIO_UPLOAD_FOLDER'])
+        os.makedirs(folder, exist_ok=True)
+        
+        # Generate a unique filename
+        timestamp = int(time.time())
+        return os.path.join(folder, f"audio_{timestamp}.mp3")
     
     def _convert_chunk(self, text, voice, output_path):
         """Helper method to convert a single chunk"""
-        return self.convert_text(text, voice, output_path)
+        # Write under a temporary name so a crash never leaves a partial chunk to be reused
+        partial_path = f"{output_path}.part"
+        self.convert_text(text, voice, partial_path)
+        os.replace(partial_path, output_path)
+        return output_path
     
     def _combine_audio_files(self, file_paths):
         """
@@ -5,8 +5,9 @@ from newspaper import Article
 from readability import Document
 import hashlib
 import logging
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urljoin
 import re
+from app.services.metrics import StageTimings
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +17,14 @@ class ContentExtractor:
     to get the best quality content from a blog URL
     """
     
-    def __init__(self, url):
+    def __init__(self, url, timings=None):
         self.url = url
         self.title = None
         self.content = None
         self.html = None
+        self.canonical_url = None  # From the page's <link rel="canonical">
         self.domain = self._get_domain()
+        self.timings = timings or StageTimings()
     
     def _get_domain(self):
         """Extract domain from URL"""
@@ -42,7 +45,9 @@ class ContentExtractor:
         }
         
         try:
-            response = requests.get(self.url, headers=headers, timeout=10)
+            with self.timings.time('fetch') as record:
+                response = requests.get(self.url, headers=headers, timeout=10)
+                record['bytes'] = len(response.content)
             response.raise_for_status()
             self.html = response.text
             return True
@@ -133,11 +138,22 @@ class ContentExtractor:
         if not self._fetch_html():
             return None, None
         
+        self.canonical_url = self._find_canonical_link()
+        
         # Try different extraction methods in order of preference
-        content = (self._extract_with_trafilatura() or 
-                   self._extract_with_newspaper() or 
-                   self._extract_with_readability() or 
-                   self._extract_with_beautifulsoup())
+        extractors = [
+            ('trafilatura', self._extract_with_trafilatura),
+            ('newspaper', self._extract_with_newspaper),
+            ('readability', self._extract_with_readability),
+            ('beautifulsoup', self._extract_with_beautifulsoup),
+        ]
+        
+        content = None
+        for name, extract_method in extractors:
+            with self.timings.time(f'parse_{name}', chars=len(self.html)):
+                content = extract_method()
+            if content:
+                break
         
         if not content:
             logger.error(f"All extraction methods failed for URL: {self.url}")
@@ -147,6 +163,19 @@ class ContentExtractor:
         content = self._clean_content(content)
         return self.title, content
     
+    def _find_canonical_link(self):
+        """Return the absolute URL of the page's rel=canonical link, if any"""
+        try:
+            soup = BeautifulSoup(self.html, 'html.parser')
+            link = soup.find('link', rel='canonical', href=True)
+            if not link:
+                return None
+            canonical = urljoin(self.url, link['href'].strip())
+            return canonical if urlparse(canonical).scheme in ('http', 'https') else None
+        except Exception as e:
+            logger.error(f"Error reading canonical link for {self.url}: {str(e)}")
+            return None
+    
     def _clean_content(self, text):
         """Clean extracted content"""
         if not text:
@@ -0,0 +1,115 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+from app import db
+from app.config import Config
+from app.models.rss_feed import RssFeed
+from app.services.rss_service import RssService, download_feed
+from app.services.url_canonicalizer import interleave_by_host
+
+logger = logging.getLogger(__name__)
+
+
+class FeedPoller:
+    """
+    Polls many feeds at once.
+
+    Downloads run on a thread pool limited overall (RSS_POLL_CONCURRENCY)
+    and per host (RSS_POLL_PER_HOST), with RSS_FETCH_TIMEOUT on every
+    request, so a slow server only holds up its own feeds. The download
+    threads never touch the database: results are applied by the calling
+    thread alone, RSS_POLL_BATCH_SIZE feeds per commit.
+    """
+
+    def __init__(self, concurrency=None, per_host=None, batch_size=None, timeout=None):
+        self.concurrency = concurrency or Config.RSS_POLL_CONCURRENCY
+        self.per_host = per_host or Config.RSS_POLL_PER_HOST
+        self.batch_size = batch_size or Config.RSS_POLL_BATCH_SIZE
+        self.timeout = timeout or Config.RSS_FETCH_TIMEOUT
+        self.rss_service = RssService()
+
+    def poll(self, feeds, max_entries=10):
+        """
+        Download the given feeds concurrently and store their new entries
+
+        Args:
+            feeds (list): RssFeed objects to poll
+            max_entries (int): Maximum entries to process per feed
+
+        Returns:
+            int: Count of new content items created
+        """
+        if not feeds:
+            return 0
+
+        # Only plain values cross into the download threads
+        targets = [(feed.id, feed.url, feed.etag, feed.modified) for feed in interleave_by_host(feeds)]
+        host_limits = {urlparse(url).netloc: threading.Semaphore(self.per_host) for _, url, _, _ in targets}
+
+        start = time.monotonic()
+        new_item_count = 0
+        results = []
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(targets))) as executor:
+            futures = [executor.submit(self._download, target, host_limits[urlparse(target[1]).netloc])
+                       for target in targets]
+            for future in as_completed(futures):
+                results.append(future.result())
+                if len(results) >= self.batch_size:
+                    new_item_count += self._apply(results, max_entries)
+                    results = []
+        new_item_count += self._apply(results, max_entries)
+
+        logger.info(f"Polled {len(targets)} feeds in {time.monotonic() - start:.1f}s, "
+                    f"{new_item_count} new items")
+        return new_item_count
+
+    def _download(self, target, host_limit):
+        """Fetch one feed; returns (feed_id, feed_data, error) and never raises"""
+        feed_id, url, etag, modified = target
+        try:
+            with host_limit:
+                return feed_id, download_feed(url, etag, modified, timeout=self.timeout), None
+        except Exception as e:
+            return feed_id, None, e
+
+    def _apply(self, results, max_entries):
+        """Apply a batch of download results in one transaction"""
+        if not results:
+            return 0
+
+        feeds = {feed.id: feed for feed in RssFeed.query.filter(RssFeed.id.in_([r[0] for r in results])).all()}
+        try:
+            new_item_count = sum(self._apply_one(feeds.get(feed_id), feed_data, error, max_entries)
+                                 for feed_id, feed_data, error in results)
+            db.session.commit()
+            return new_item_count
+        except Exception as e:
+            # One bad feed shouldn't lose the whole batch; fall back to a commit per feed
+            logger.warning(f"Batch of {len(results)} feeds failed ({str(e)}); applying them one by one")
+            db.session.rollback()
+            return self._apply_slowly(results, max_entries)
+
+    def _apply_slowly(self, results, max_entries):
+        """Fallback for _apply that gives each feed its own transaction"""
+        new_item_count = 0
+        for feed_id, feed_data, error in results:
+            feed = RssFeed.query.get(feed_id)
+            try:
+                new_item_count += self._apply_one(feed, feed_data, error, max_entries)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._apply_one(RssFeed.query.get(feed_id), None, e, max_entries)
+                db.session.commit()
+        return new_item_count
+
+    def _apply_one(self, feed, feed_data, error, max_entries):
+        if feed is None:
+            return 0
+        if error is not None:
+            logger.error(f"Error fetching feed {feed.url}: {str(error)}")
+            self.rss_service.record_feed_error(feed)
+            return 0
+        return len(self.rss_service.apply_feed_data(feed, feed_data, max_entries))
@@ -0,0 +1,99 @@
+import re
+import random
+import calendar
+import logging
+from datetime import datetime, timedelta
+from statistics import median
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r'max-age\s*=\s*(\d+)', re.IGNORECASE)
+_SKIP_HOURS = re.compile(rb'<skipHours>(.*?)</skipHours>', re.IGNORECASE | re.DOTALL)
+_HOUR = re.compile(rb'<hour>\s*(\d{1,2})\s*</hour>', re.IGNORECASE)
+
+_RECENT_ENTRIES = 10  # Entries used to measure how often a feed publishes
+
+
+def parse_skip_hours(content):
+    """
+    Read the RSS <skipHours> element, which feedparser doesn't keep
+
+    Args:
+        content (bytes): Raw feed document
+
+    Returns:
+        list: UTC hours (0-23) in which the feed asks not to be polled
+    """
+    match = _SKIP_HOURS.search(content or b'')
+    if not match:
+        return []
+    return sorted({int(hour) % 24 for hour in _HOUR.findall(match.group(1))})
+
+
+def schedule_next_poll(feed, feed_data=None, now=None):
+    """
+    Set feed.poll_interval and feed.next_poll_at after a poll
+
+    Successful polls space checks by the feed's recent gap between posts,
+    stretched for feeds that have gone quiet, never sooner than the
+    feed's <ttl> or the response's Cache-Control max-age, and moved out of
+    its <skipHours>, and rarely while a WebSub hub pushes its posts. An
+    unchanged (304) feed keeps its interval. Failed
+    polls back off exponentially with the feed's error_count.
+
+    Args:
+        feed (RssFeed): The feed that was polled; error_count must be current
+        feed_data (FeedParserDict, optional): Result of download_feed; None after a failure
+        now (datetime, optional): Time of the poll (default: utcnow)
+    """
+    now = now or datetime.utcnow()
+
+    if feed_data is None:
+        interval = Config.RSS_POLL_ERROR_BACKOFF * 2 ** max((feed.error_count or 1) - 1, 0)
+    else:
+        interval = feed.poll_interval or Config.RSS_POLL_DEFAULT_INTERVAL
+        if feed_data.get('status') != 304:
+            interval = _publish_interval(feed_data, now) or interval
+
+        ttl = feed_data.get('feed', {}).get('ttl')
+        if ttl and str(ttl).strip().isdigit():
+            interval = max(interval, int(ttl) * 60)
+        max_age = _MAX_AGE.search((feed_data.get('headers') or {}).get('cache-control', ''))
+        if max_age:
+            interval = max(interval, int(max_age.group(1)))
+        if feed.is_pushed:
+            # New posts arrive by WebSub; polling only covers missed pushes
+            interval = max(interval, Config.WEBSUB_POLL_INTERVAL)
+
+    interval = int(min(max(interval, Config.RSS_POLL_MIN_INTERVAL), Config.RSS_POLL_MAX_INTERVAL))
+    # Jitter keeps feeds added together from being polled in lockstep
+    next_poll_at = now + timedelta(seconds=interval * random.uniform(0.9, 1.1))
+
+    skip_hours = set(feed_data.get('skip_hours', [])) if feed_data is not None else set()
+    if len(skip_hours) < 24:
+        while next_poll_at.hour in skip_hours:
+            next_poll_at = next_poll_at.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+    feed.poll_interval = interval
+    feed.next_poll_at = next_poll_at
+
+
+def _publish_interval(feed_data, now):
+    """Median seconds between the feed's recent posts, or None without enough dates"""
+    published = sorted(
+        (calendar.timegm(date) for date in
+         (entry.get('published_parsed') or entry.get('updated_parsed') for entry in feed_data.get('entries', []))
+         if date),
+        reverse=True
+    )[:_RECENT_ENTRIES]
+    if len(published) < 2:
+        return None
+
+    gaps = [newer - older for newer, older in zip(published, published[1:]) if newer > older]
+    if not gaps:
+        return None
+
+    # A feed that hasn't posted for a while is polled less often as the silence grows
+    quiet_for = calendar.timegm(now.utctimetuple()) - published[0]
+    return max(median(gaps), quiet_for / 4)
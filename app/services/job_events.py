@@ -0,0 +1,270 @@
+import json
+import time
+import logging
+import threading
+from flask import current_app
+from app import db, cache
+from app.models.audio_content import AudioContent
+from app.services.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Rough share of the progress bar covered by each stage
+STAGE_PROGRESS = {
+    'queued': 5,
+    'extract': 10,
+    'process': 25,
+    'synthesize': 30,
+    'combine': 90,
+}
+TERMINAL_STATUSES = ('completed', 'error')
+
+# Seconds the in-process broker keeps the events of a job after its last one
+LOCAL_EVENT_RETENTION = 10 * 60
+
+
+class _LocalBroker:
+    """In-process pub/sub used when no Redis URL is configured"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._events = {}  # content_id -> list of (sequence, event)
+        self._published_at = {}  # content_id -> time of its last event, least recent first
+        self._sequence = 0
+
+    def publish(self, content_id, event):
+        with self._condition:
+            self._sequence += 1
+            events = self._events.setdefault(content_id, [])
+            events.append((self._sequence, event))
+            del events[:-50]  # Subscribers only need recent history
+
+            now = time.monotonic()
+            self._published_at.pop(content_id, None)
+            self._published_at[content_id] = now
+            self._expire(now)
+            self._condition.notify_all()
+
+    def _expire(self, now):
+        """Forget jobs that have been quiet for LOCAL_EVENT_RETENTION seconds"""
+        expired = []
+        for content_id, published_at in self._published_at.items():
+            if now - published_at < LOCAL_EVENT_RETENTION:
+                break
+            expired.append(content_id)
+        for content_id in expired:
+            del self._published_at[content_id]
+            del self._events[content_id]
+
+    def subscribe(self, content_id, timeout):
+        with self._condition:
+            last_seen = self._sequence
+        yield None  # Subscribed
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: any(seq > last_seen for seq, _ in self._events.get(content_id, [])),
+                    timeout=timeout
+                )
+                pending = [(seq, event) for seq, event in self._events.get(content_id, [])
+                           if seq > last_seen]
+            if not pending:
+                yield None
+                continue
+            for seq, event in pending:
+                last_seen = seq
+                yield event
+
+
+class _RedisBroker:
+    """Redis pub/sub so events published by worker processes reach the web process"""
+
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _channel(content_id):
+        return f"blog2audio:job:{content_id}"
+
+    def publish(self, content_id, event):
+        self._redis.publish(self._channel(content_id), json.dumps(event))
+
+    def subscribe(self, content_id, timeout):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel(content_id))
+        try:
+            yield None  # Subscribed
+            while True:
+                message = pubsub.get_message(timeout=timeout)
+                yield json.loads(message['data']) if message else None
+        finally:
+            pubsub.close()
+
+
+_local_broker = _LocalBroker()
+_redis_brokers = {}
+
+
+def _get_broker():
+    url = current_app.config.get('EVENTS_REDIS_URL')
+    if not url:
+        return _local_broker
+    if url not in _redis_brokers:
+        _redis_brokers[url] = _RedisBroker(url)
+    return _redis_brokers[url]
+
+
+def _cache_key(content_id):
+    return f"job-status:{content_id}"
+
+
+class JobEvents:
+    """
+    Publishes job progress and serves lightweight status snapshots.
+
+    Every event updates a status snapshot in the app cache, so status
+    requests are answered without loading the content row, and is
+    broadcast to subscribers of that job (Server-Sent Events clients).
+    """
+
+    def __init__(self):
+        self.broker = _get_broker()
+        self.is_local = isinstance(self.broker, _LocalBroker)
+        self.cache_timeout = current_app.config['STATUS_CACHE_TIMEOUT']
+
+    def publish(self, content_id, status, **fields):
+        """
+        Record a status change for a job and notify subscribers
+
+        Args:
+            content_id (int): ID of the AudioContent
+            status (str): pending, processing, completed or error
+            **fields: Extra snapshot fields (stage, chunks_done, error, ...)
+        """
+        # A newly queued run starts from a clean snapshot
+        snapshot = {} if fields.get('stage') == 'queued' else (cache.get(_cache_key(content_id)) or {})
+        snapshot.update(fields)
+        snapshot['status'] = status
+        snapshot['is_processed'] = status in TERMINAL_STATUSES
+        snapshot['progress'] = self._progress(snapshot)
+        snapshot['content_id'] = content_id
+
+        cache.set(_cache_key(content_id), snapshot, timeout=self.cache_timeout)
+        if fields.get('stage') == 'queued' or snapshot['is_processed']:
+            # A new run or a new outcome makes cached pages for the content stale
+            ResponseCache.invalidate_content(content_id)
+        try:
+            self.broker.publish(content_id, snapshot)
+        except Exception as e:
+            # Status is still served from the snapshot, so a broker outage is not fatal
+            logger.warning(f"Could not publish event for content {content_id}: {str(e)}")
+
+    def snapshot(self, content_id):
+        """
+        Return the latest status of a job
+
+        Served from the cache when possible; otherwise only the status
+        columns are read from the database.
+
+        Returns:
+            dict: Status snapshot, or None if the content does not exist
+        """
+        # Without Redis the cache is per process, so only finished snapshots can be trusted
+        snapshot = cache.get(_cache_key(content_id))
+        if snapshot and (not self.is_local or snapshot['status'] in TERMINAL_STATUSES):
+            ResponseCache.record('status', hit=True)
+            return snapshot
+        ResponseCache.record('status', hit=False)
+
+        row = db.session.query(
+            AudioContent.state, AudioContent.error,
+            AudioContent.title, AudioContent.duration, AudioContent.word_count
+        ).filter(AudioContent.id == content_id).first()
+        if row is None:
+            return None
+
+        snapshot = {
+            'content_id': content_id,
+            'status': row.state,
+            'is_processed': row.state in TERMINAL_STATUSES,
+            'error': row.error,
+            'title': row.title,
+            'duration': row.duration,
+            'word_count': row.word_count,
+        }
+        snapshot['progress'] = self._progress(snapshot)
+
+        # Finished jobs never change again, so they can be cached for good
+        if snapshot['status'] in TERMINAL_STATUSES:
+            cache.set(_cache_key(content_id), snapshot, timeout=self.cache_timeout)
+        return snapshot
+
+    def subscribe(self, content_id, timeout):
+        """
+        Yield status snapshots for a job as they are published
+
+        Yields None once subscribed, so callers can re-check the snapshot
+        without missing an event published in between, and again after
+        `timeout` seconds without an event, for keep-alives.
+        """
+        return self.broker.subscribe(content_id, timeout)
+
+    @staticmethod
+    def _progress(snapshot):
+        status = snapshot.get('status')
+        if status in TERMINAL_STATUSES:
+            return 100
+        if status == 'pending':
+            return 0
+
+        stage = snapshot.get('stage', 'queued')
+        progress = STAGE_PROGRESS.get(stage, 5)
+        if stage == 'synthesize' and snapshot.get('chunks_total'):
+            share = snapshot.get('chunks_done', 0) / snapshot['chunks_total']
+            progress += int(share * (STAGE_PROGRESS['combine'] - STAGE_PROGRESS['synthesize']))
+        return progress
+
+
+def format_sse(snapshot):
+    """Format a snapshot as a Server-Sent Events message"""
+    return f"event: status\ndata: {json.dumps(snapshot)}\n\n"
+
+
+def stream_status(content_id, snapshot):
+    """
+    Generate the Server-Sent Events stream for a job
+
+    Args:
+        content_id (int): ID of the AudioContent
+        snapshot (dict): Current status, sent first
+    """
+    yield format_sse(snapshot)
+    if snapshot['status'] in TERMINAL_STATUSES:
+        return
+
+    config = current_app.config
+    events = JobEvents()
+    # The in-process broker can't see worker processes, so it re-checks the snapshot more often
+    timeout = config['SSE_POLL_INTERVAL'] if events.is_local else config['SSE_KEEPALIVE_INTERVAL']
+    # Close long streams; EventSource reconnects on its own
+    deadline = time.monotonic() + config['SSE_MAX_STREAM_SECONDS']
+    last = snapshot
+    for event in events.subscribe(content_id, timeout):
+        if event is None:
+            # Catch changes made before the subscription started, or that the broker can't see
+            event = events.snapshot(content_id)
+            db.session.remove()  # Each poll uses a short-lived session
+            if event == last:
+                event = None
+
+        if event is None:
+            yield ": keepalive\n\n"
+        else:
+            last = event
+            yield format_sse(event)
+            if event['status'] in TERMINAL_STATUSES:
+                return
+
+        if time.monotonic() > deadline:
+            return
@@ -0,0 +1,531 @@
+from datetime import datetime, timedelta
+import math
+import logging
+from flask import current_app
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.job import Job
+from app.models.audio_content import AudioContent
+from app.models.batch import ConversionBatch, batch_items
+from app.services.job_events import JobEvents
+from app.services.admission import AdmissionControl, pipeline_capacity
+from app.services.url_canonicalizer import canonicalize_url, interleave_by_host
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity and cannot accept more work"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after  # Seconds until capacity is expected, if known
+
+
+class JobQueue:
+    """
+    Persistent job queue backed by the application database.
+
+    Jobs are claimed atomically with a conditional UPDATE, so any number of
+    worker processes can poll the same table. A claimed job is leased to its
+    worker, which renews the lease with heartbeats; if the worker dies, the
+    lease expires and the reaper puts the job back in the queue.
+    """
+
+    def __init__(self, lease_seconds=None, max_attempts=None, max_depth=None):
+        config = current_app.config
+        self.lease_seconds = lease_seconds or config['JOB_LEASE_SECONDS']
+        self.max_attempts = max_attempts or config['JOB_MAX_ATTEMPTS']
+        self.max_depth = max_depth if max_depth is not None else config['JOB_QUEUE_MAX_DEPTH']
+
+    def depth(self):
+        """Return the number of conversion jobs waiting to be claimed"""
+        return Job.query.filter_by(status='queued', kind=Job.KIND_CONVERT).count()
+
+    def submit(self, url, voice, user_id=None, priority=Job.PRIORITY_INTERACTIVE):
+        """
+        Claim a URL and voice for conversion, or attach to an existing claim
+
+        Concurrent submissions of the same URL and voice share one content
+        row: the unique claim_key decides which submitter creates it, and
+        everyone else gets that row back instead of starting another run.
+        URLs are compared in canonical form, so tracking parameters, AMP
+        links and the like reuse the article's existing conversion.
+
+        Args:
+            url (str): URL to convert
+            voice (str): Voice to use for conversion
+            user_id (int, optional): Submitting user
+            priority (int): Job priority class
+
+        Returns:
+            tuple: (AudioContent, Job) where Job is None if the caller attached
+                   to a completed or in-flight conversion
+
+        Raises:
+            QueueFullError: If new work is needed and the queue is full
+        """
+        key = AudioContent.make_claim_key(url, voice)
+        content = AudioContent.query.filter_by(claim_key=key).first()
+
+        if content is None:
+            content = self._find_completed_canonical([url], voice).get(canonicalize_url(url))
+
+        # Finished results are served without touching the queue
+        if content and content.state == AudioContent.STATE_COMPLETED:
+            return content, None
+
+        # So are conversions already queued or running; only new work needs room in the queue
+        if content and content.state == AudioContent.STATE_PROCESSING:
+            return content, None
+
+        self.check_capacity()
+
+        if content is None:
+            content = AudioContent(url=url, user_id=user_id, voice=voice)
+            content.state = AudioContent.STATE_PROCESSING
+            db.session.add(content)
+            try:
+                db.session.flush()
+            except IntegrityError:
+                # Another submitter claimed this URL first; attach to their row
+                db.session.rollback()
+                content = AudioContent.query.filter_by(claim_key=key).first()
+                if content is None:
+                    # The competing claim was rolled back, so try again from the top
+                    return self.submit(url, voice, user_id, priority)
+            else:
+                return content, self.enqueue(content.id, voice, priority)
+
+        return content, self.start(content.id, voice, priority)
+
+    def start(self, content_id, voice, priority=Job.PRIORITY_INTERACTIVE):
+        """
+        Queue an existing content row unless it is already queued or done
+
+        Args:
+            content_id (int): ID of the AudioContent to process
+            voice (str): Voice to use for conversion
+            priority (int): Job priority class
+
+        Returns:
+            Job: The queued job, or None if the content is already in flight or done
+        """
+        if not self._mark_queued(content_id):
+            db.session.rollback()
+            return None
+
+        return self.enqueue(content_id, voice, priority)
+
+    def refresh(self, content_id, priority=Job.PRIORITY_INTERACTIVE):
+        """
+        Queue a completed content row to be converted again from its page
+
+        The pipeline re-extracts the article and synthesizes only the chunks
+        whose text changed, reusing the audio of the rest; if nothing
+        changed, the existing audio is kept as is.
+
+        Args:
+            content_id (int): ID of the AudioContent to refresh
+            priority (int): Job priority class
+
+        Returns:
+            Job: The queued job, or None if the content is not completed
+
+        Raises:
+            QueueFullError: If the queue cannot take the job
+        """
+        self.check_capacity()
+
+        refreshing = AudioContent.query.filter(
+            AudioContent.id == content_id,
+            AudioContent.state == AudioContent.STATE_COMPLETED
+        ).update({
+            'state': AudioContent.STATE_PROCESSING,
+            'error': None,
+            # Text prepared ahead of the first conversion is out of date now
+            'prefetched_at': None,
+            'chunk_plan': None,
+        }, synchronize_session=False)
+        if not refreshing:
+            db.session.rollback()
+            return None
+
+        voice = db.session.query(AudioContent.voice).filter_by(id=content_id).scalar()
+        return self.enqueue(content_id, voice, priority)
+
+    def submit_batch(self, urls, voice, user_id=None, priority=Job.PRIORITY_API):
+        """
+        Claim many URLs at once and queue the ones that need work
+
+        Existing claims are found with a single query, new rows and their
+        jobs are inserted in one transaction, and jobs are ordered
+        round-robin across hosts so the fetch stage doesn't hit one site
+        with the whole batch at once.
+
+        Args:
+            urls (list): URLs to convert; duplicates are collapsed
+            voice (str): Voice to use for conversion
+            user_id (int, optional): Submitting user
+            priority (int): Job priority class
+
+        Returns:
+            ConversionBatch: The batch grouping every submitted content
+
+        Raises:
+            QueueFullError: If the new jobs would overflow the queue
+        """
+        urls = list(dict.fromkeys(url.strip() for url in urls))
+        keys = {AudioContent.make_claim_key(url, voice): url for url in urls}
+
+        claimed = {content.claim_key: content for content in
+                   AudioContent.query.filter(AudioContent.claim_key.in_(list(keys))).all()}
+        missing = [url for key, url in keys.items() if key not in claimed]
+        by_canonical = self._find_completed_canonical(missing, voice)
+        for url in missing:
+            content = by_canonical.get(canonicalize_url(url))
+            if content:
+                claimed[AudioContent.make_claim_key(url, voice)] = content
+        new_urls = [url for key, url in keys.items() if key not in claimed]
+        # Several URLs can resolve to one row, e.g. a URL and its page's rel=canonical link
+        existing = {content.id: content for content in claimed.values()}
+        rerun = [content for content in existing.values()
+                 if content.state in (AudioContent.STATE_PENDING, AudioContent.STATE_ERROR)]
+
+        self.check_capacity(len(new_urls) + len(rerun))
+
+        new_contents = []
+        for url in new_urls:
+            content = AudioContent(url=url, user_id=user_id, voice=voice)
+            content.state = AudioContent.STATE_PROCESSING
+            new_contents.append(content)
+        db.session.add_all(new_contents)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # A concurrent submission claimed some of these URLs; take the one-by-one path
+            db.session.rollback()
+            return self._submit_batch_slowly(urls, voice, user_id, priority)
+
+        to_queue = new_contents + [content for content in rerun if self._mark_queued(content.id)]
+        estimated_chars = AdmissionControl().estimate_job_chars()
+        jobs = [Job(content_id=content.id, voice=voice, priority=priority, estimated_chars=estimated_chars)
+                for content in interleave_by_host(to_queue)]
+        db.session.add_all(jobs)
+
+        batch = ConversionBatch(voice=voice, user_id=user_id)
+        batch.item_count = len(keys)
+        db.session.add(batch)
+        db.session.flush()
+        content_ids = list(existing) + [content.id for content in new_contents]
+        db.session.execute(batch_items.insert(), [
+            {'batch_id': batch.id, 'content_id': content_id} for content_id in content_ids
+        ])
+        db.session.commit()
+
+        logger.info(f"Batch {batch.id}: {len(urls)} URLs, {len(jobs)} queued")
+        events = JobEvents()
+        for job in jobs:
+            events.publish(job.content_id, 'processing', stage='queued')
+        return batch
+
+    def _find_completed_canonical(self, urls, voice):
+        """
+        Find finished conversions whose canonical URL matches any of the given URLs
+
+        This catches articles first converted under a different URL whose
+        page named one of these as its rel=canonical link.
+
+        Returns:
+            dict: Canonical URL -> completed AudioContent
+        """
+        canonical_urls = {canonicalize_url(url) for url in urls}
+        if not canonical_urls:
+            return {}
+        contents = AudioContent.query.filter(AudioContent.canonical_url.in_(list(canonical_urls)),
+                                             AudioContent.voice == voice,
+                                             AudioContent.state == AudioContent.STATE_COMPLETED).all()
+        return {content.canonical_url: content for content in contents}
+
+    def _submit_batch_slowly(self, urls, voice, user_id, priority):
+        """Fallback for submit_batch that claims each URL in its own transaction"""
+        contents = [self.submit(url, voice, user_id, priority)[0] for url in urls]
+
+        batch = ConversionBatch(voice=voice, user_id=user_id)
+        batch.item_count = len(urls)
+        db.session.add(batch)
+        db.session.flush()
+        db.session.execute(batch_items.insert(), [
+            {'batch_id': batch.id, 'content_id': content_id}
+            for content_id in dict.fromkeys(content.id for content in contents)
+        ])
+        db.session.commit()
+        return batch
+
+    def _mark_queued(self, content_id):
+        """
+        Move a pending or failed content row to processing
+
+        The conditional UPDATE lets only one caller win, which is what
+        keeps a URL from being queued twice.
+
+        Returns:
+            bool: True if this caller moved the row
+        """
+        return bool(AudioContent.query.filter(
+            AudioContent.id == content_id,
+            AudioContent.state.in_((AudioContent.STATE_PENDING, AudioContent.STATE_ERROR))
+        ).update({
+            'state': AudioContent.STATE_PROCESSING,
+            'error': None,
+        }, synchronize_session=False))
+
+    def check_capacity(self, jobs=1):
+        """
+        Make sure the queue can take more jobs
+
+        Args:
+            jobs (int): Number of jobs about to be queued
+
+        Raises:
+            QueueFullError: If the queue would exceed max_depth jobs, or its
+                            estimated TTS backlog would take too long to clear
+        """
+        if self.max_depth and self.depth() + jobs > self.max_depth:
+            raise QueueFullError("The conversion queue is full, please try again later")
+
+        retry_after = AdmissionControl().retry_after(jobs)
+        if retry_after:
+            minutes = math.ceil(retry_after / 60)
+            raise QueueFullError(f"The service is busy, please try again in about {minutes} "
+                                 f"minute{'s' if minutes != 1 else ''}", retry_after=retry_after)
+
+    def enqueue(self, content_id, voice=None, priority=Job.PRIORITY_INTERACTIVE):
+        """
+        Add a job for the given content to the queue and commit
+
+        Args:
+            content_id (int): ID of the AudioContent to process
+            voice (str): Voice to use for conversion
+            priority (int): Job priority class
+
+        Returns:
+            Job: The queued job
+        """
+        job = Job(content_id=content_id, voice=voice, priority=priority,
+                  estimated_chars=AdmissionControl().estimate_job_chars())
+        db.session.add(job)
+        db.session.commit()
+
+        JobEvents().publish(content_id, 'processing', stage='queued', eta=AdmissionControl().eta(job))
+
+        logger.info(f"Queued job {job.id} for content {content_id}")
+        return job
+
+    def claim(self, worker_id):
+        """
+        Atomically claim the most urgent available job
+
+        Jobs are taken in priority order, oldest first within a class. A job
+        is promoted one class for every JOB_PRIORITY_AGING seconds it waits,
+        so backfill work can't starve. Jobs that are not (or not yet)
+        interactive may only start while fewer than the running limit minus
+        JOB_RESERVED_INTERACTIVE jobs are running, keeping slots free for
+        interactive submissions. The running limit is JOB_RUNNING_LIMIT,
+        capped at what the worker processes' pipelines can actually hold.
+
+        Args:
+            worker_id (str): Identifier of the claiming worker
+
+        Returns:
+            Job: The claimed job, or None if nothing is available
+        """
+        now = datetime.utcnow()
+        claimable = Job.status == 'queued'
+
+        for job_id in self._candidates(claimable, now):
+            claimed = Job.query.filter(Job.id == job_id, claimable).update({
+                'status': 'running',
+                'worker_id': worker_id,
+                'locked_until': now + timedelta(seconds=self.lease_seconds),
+                'heartbeat_at': now,
+                'attempts': Job.attempts + 1,
+                'started_at': now,
+            }, synchronize_session=False)
+            db.session.commit()
+
+            # Another worker won the race for this job, try the next one
+            if claimed:
+                return Job.query.get(job_id)
+
+        return None
+
+    def _candidates(self, claimable, now):
+        """Return claimable job IDs in the order they should be tried"""
+        config = current_app.config
+        aging = config['JOB_PRIORITY_AGING']
+
+        running = Job.query.filter(Job.status == 'running', Job.locked_until >= now).count()
+        running_limit = min(config['JOB_RUNNING_LIMIT'], config['WORKER_PROCESSES'] * pipeline_capacity(config))
+        low_priority_allowed = running < running_limit - config['JOB_RESERVED_INTERACTIVE']
+
+        # The oldest few jobs of each class are enough to pick from
+        candidates = []
+        for priority in (Job.PRIORITY_INTERACTIVE, Job.PRIORITY_API, Job.PRIORITY_BACKFILL, Job.PRIORITY_PREFETCH):
+            rows = db.session.query(Job.id, Job.created_at).filter(claimable, Job.priority == priority)\
+                                                           .order_by(Job.created_at, Job.id)\
+                                                           .limit(5).all()
+            for job_id, created_at in rows:
+                waited = (now - created_at).total_seconds()
+                effective = max(Job.PRIORITY_INTERACTIVE, priority - int(waited // aging))
+                if priority == Job.PRIORITY_PREFETCH:
+                    # Speculative work only uses capacity nothing else wants
+                    effective = priority
+                if effective == Job.PRIORITY_INTERACTIVE or low_priority_allowed:
+                    candidates.append((effective, created_at, job_id))
+
+        return [job_id for _, _, job_id in sorted(candidates)]
+
+    def complete(self, job_id, worker_id):
+        """Mark a job as done; returns False if the worker no longer holds its lease"""
+        return self._finish(job_id, worker_id, 'done')
+
+    def fail(self, job_id, worker_id, error):
+        """Mark a job as failed; returns False if the worker no longer holds its lease"""
+        return self._finish(job_id, worker_id, 'failed', error)
+
+    def _finish(self, job_id, worker_id, status, error=None):
+        # Only the lease holder may finish the job; a reaped worker must not overwrite its successor
+        finished = Job.query.filter(
+            Job.id == job_id,
+            Job.worker_id == worker_id,
+            Job.status == 'running'
+        ).update({
+            'status': status,
+            'error': error,
+            'locked_until': None,
+            'finished_at': datetime.utcnow(),
+        }, synchronize_session=False)
+        db.session.commit()
+
+        if not finished:
+            logger.warning(f"Worker {worker_id} lost the lease on job {job_id}; not marking it {status}")
+        return bool(finished)
+
+    def heartbeat(self, worker_id, job_ids):
+        """
+        Renew the leases a worker holds on its running jobs
+
+        Args:
+            worker_id (str): Identifier of the worker
+            job_ids (list): IDs of the jobs the worker is still running
+
+        Returns:
+            int: Number of leases renewed; fewer than len(job_ids) means some
+                 jobs were reaped and now belong to another worker
+        """
+        if not job_ids:
+            return 0
+
+        now = datetime.utcnow()
+        renewed = Job.query.filter(
+            Job.id.in_(job_ids),
+            Job.worker_id == worker_id,
+            Job.status == 'running'
+        ).update({
+            'locked_until': now + timedelta(seconds=self.lease_seconds),
+            'heartbeat_at': now,
+        }, synchronize_session=False)
+        db.session.commit()
+
+        if renewed < len(job_ids):
+            logger.warning(f"Worker {worker_id} lost the lease on {len(job_ids) - renewed} job(s)")
+        return renewed
+
+    def reap_expired(self):
+        """
+        Recover work left behind by workers that died
+
+        Running jobs whose lease expired go back to the queue, or fail once
+        they have used all of their attempts. Content rows stuck in
+        processing without any live job (e.g. from before the job queue)
+        are queued again.
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        now = datetime.utcnow()
+        self._fail_exhausted(now)
+
+        expired = and_(Job.status == 'running', Job.locked_until < now)
+        requeued = []
+        for job_id, content_id, kind in db.session.query(Job.id, Job.content_id, Job.kind).filter(expired).all():
+            # Conditional, so a late heartbeat or another reaper wins cleanly
+            reclaimed = Job.query.filter(Job.id == job_id, expired).update({
+                'status': 'queued',
+                'worker_id': None,
+                'locked_until': None,
+                'heartbeat_at': None,
+                'reclaim_count': Job.reclaim_count + 1,
+            }, synchronize_session=False)
+            db.session.commit()
+            if reclaimed:
+                logger.warning(f"Reclaimed job {job_id} from an expired lease")
+                requeued.append((content_id, kind))
+
+        events = JobEvents()
+        for content_id, kind in requeued:
+            if kind == Job.KIND_CONVERT:
+                events.publish(content_id, 'processing', stage='queued')
+
+        return len(requeued) + self._requeue_orphans(now)
+
+    def _requeue_orphans(self, now):
+        """Queue content rows that are marked processing but have no live job"""
+        live_job = Job.query.filter(Job.content_id == AudioContent.id,
+                                    Job.status.in_(('queued', 'running'))).exists()
+        stuck = and_(AudioContent.state == AudioContent.STATE_PROCESSING,
+                     AudioContent.created_at < now - timedelta(seconds=self.lease_seconds),
+                     ~live_job)
+
+        count = 0
+        for content_id, voice in db.session.query(AudioContent.id, AudioContent.voice).filter(stuck).all():
+            # Release the row so start() can claim it again with the usual conditional UPDATE
+            released = AudioContent.query.filter(AudioContent.id == content_id, stuck).update(
+                {'state': AudioContent.STATE_PENDING}, synchronize_session=False
+            )
+            if not released:
+                db.session.rollback()
+                continue
+
+            job = self.start(content_id, voice, Job.PRIORITY_BACKFILL)
+            if job:
+                logger.warning(f"Requeued content {content_id} that was stuck in processing")
+                count += 1
+        return count
+
+    def _fail_exhausted(self, now):
+        """Give up on expired jobs that have already used all of their attempts"""
+        exhausted = Job.query.filter(Job.status == 'running',
+                                     Job.locked_until < now,
+                                     Job.attempts >= self.max_attempts).all()
+        for job in exhausted:
+            logger.error(f"Job {job.id} timed out after {job.attempts} attempts")
+            job.status = 'failed'
+            job.error = 'Job timed out'
+            job.finished_at = now
+            if job.kind == Job.KIND_PREFETCH:
+                continue  # The content was never queued for conversion
+            content = AudioContent.query.get(job.content_id)
+            if content and content.file_path:
+                content.state = AudioContent.STATE_COMPLETED  # A refresh timed out; keep the old audio
+            elif content:
+                content.error = 'Processing timed out'
+                content.state = AudioContent.STATE_ERROR
+
+        if exhausted:
+            db.session.commit()
+            events = JobEvents()
+            for job in exhausted:
+                if job.kind == Job.KIND_CONVERT:
+                    events.publish(job.content_id, 'error', error='Processing timed out')
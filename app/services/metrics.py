@@ -0,0 +1,103 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from prometheus_client import (Counter, Histogram, CollectorRegistry, REGISTRY,
+                               CONTENT_TYPE_LATEST, generate_latest, multiprocess)
+
+# Histograms are shared by every process when PROMETHEUS_MULTIPROC_DIR is set,
+# so the web process can report timings recorded by the queue workers
+STAGE_SECONDS = Histogram(
+    'blog2audio_stage_seconds', 'Time spent in each pipeline stage',
+    ['stage'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+STAGE_WAIT_SECONDS = Histogram(
+    'blog2audio_stage_wait_seconds', 'Time a job waited in the queue in front of a stage',
+    ['stage'],
+    buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600)
+)
+STAGE_CHARS = Histogram(
+    'blog2audio_stage_chars', 'Characters handled by each pipeline stage',
+    ['stage'],
+    buckets=(100, 500, 1000, 2000, 4096, 10000, 25000, 50000, 100000, 250000)
+)
+STAGE_BYTES = Histogram(
+    'blog2audio_stage_bytes', 'Bytes produced or downloaded by each pipeline stage',
+    ['stage'],
+    buckets=(1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+)
+
+TTS_CHUNK_CHARS = Counter(
+    'blog2audio_tts_chunk_chars', 'Characters of chunk text by result (synthesized, or reused from earlier audio)',
+    ['result']
+)
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    'blog2audio_response_cache_lookups', 'Cached response lookups by route and result (hit or miss)',
+    ['route', 'result']
+)
+
+
+class StageTimings:
+    """
+    Collects timing records for one job and feeds the stage histograms.
+
+    Each record is a plain dict (stage, seconds and optional chars, bytes and
+    wait) so the list can be stored as JSON on the AudioContent row.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, stage, chars=None, bytes=None, wait=None):
+        """
+        Time the wrapped block as one record
+
+        The yielded record can be updated inside the block, e.g. to set the
+        byte count once a response has arrived.
+        """
+        record = {'stage': stage, 'chars': chars, 'bytes': bytes}
+        if wait is not None:
+            record['wait'] = round(wait, 4)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self._add(record, time.perf_counter() - start)
+
+    def add(self, stage, seconds, chars=None, bytes=None):
+        """Record a duration measured elsewhere"""
+        self._add({'stage': stage, 'chars': chars, 'bytes': bytes}, seconds)
+
+    def _add(self, record, seconds):
+        record['seconds'] = round(seconds, 4)
+        stage = record['stage']
+
+        STAGE_SECONDS.labels(stage).observe(seconds)
+        if record.get('wait') is not None:
+            STAGE_WAIT_SECONDS.labels(stage).observe(record['wait'])
+        if record.get('chars') is not None:
+            STAGE_CHARS.labels(stage).observe(record['chars'])
+        if record.get('bytes') is not None:
+            STAGE_BYTES.labels(stage).observe(record['bytes'])
+
+        with self._lock:
+            self.records.append(record)
+
+
+def render_metrics():
+    """
+    Render all metrics in the Prometheus text format
+
+    Returns:
+        tuple: (body, content_type)
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,63 @@
+import base64
+from datetime import datetime
+from sqlalchemy import or_, and_
+
+
+def encode_cursor(created_at, row_id):
+    """Encode the position after a row as an opaque cursor string"""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by encode_cursor
+
+    Returns:
+        tuple: (created_at, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_page(query, model, cursor=None, per_page=20):
+    """
+    Return one page of a query, newest first, using keyset pagination
+
+    Rows are ordered by (created_at, id) descending and the cursor marks the
+    last row of the previous page, so every page is an index range scan no
+    matter how deep it is.
+
+    Args:
+        query: Query over `model`, already filtered
+        model: Model class with created_at and id columns
+        cursor (str): Cursor from the previous page, None for the first page
+        per_page (int): Rows per page
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+
+    # One extra row tells us whether another page exists
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(per_page + 1).all()
+    if len(rows) <= per_page:
+        return rows, None
+
+    rows = rows[:per_page]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
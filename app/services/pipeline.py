@@ -0,0 +1,425 @@
+import os
+import queue
+import itertools
+import shutil
+import logging
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.config import Config
+from app.models.audio_content import AudioContent
+from app.models.job import Job
+from app.services.content_extractor import ContentExtractor
+from app.services.text_processor import TextProcessor
+from app.services.audio_converter import AudioConverter
+from app.services.metrics import StageTimings
+from app.services.admission import pipeline_capacity
+from app.services.job_events import JobEvents
+from app.services.url_canonicalizer import canonicalize_url
+from app.services.podcast_feed import add_to_podcasts
+
+logger = logging.getLogger(__name__)
+
+# Sentinel that tells a stage thread to exit
+_STOP = object()
+
+
+class PipelineJob:
+    """State carried by one job as it moves through the pipeline stages"""
+
+    def __init__(self, content_id, voice=None, job_id=None, priority=0, kind=Job.KIND_CONVERT):
+        self.content_id = content_id
+        self.voice = voice or Config.DEFAULT_VOICE
+        self.job_id = job_id
+        self.priority = priority
+        self.kind = kind
+        self.chunks = []
+        self.chunk_paths = []
+        self.work_dir = None
+        self.timings = StageTimings()
+        self.enqueued_at = None  # When the job entered its current stage's queue
+        self.done = False  # Set by a stage that finished the content early
+        self.superseded = False  # Set when a prefetch finds its content already being converted
+
+    def __repr__(self):
+        return f'<PipelineJob content={self.content_id} job={self.job_id}>'
+
+    @property
+    def is_prefetch(self):
+        """True for speculative jobs that stop before TTS and leave the content pending"""
+        return self.kind == Job.KIND_PREFETCH
+
+
+def _superseded(pjob, content):
+    """
+    Stop a prefetch job whose content has left the pending state
+
+    A conversion started (or finished) after the prefetch was queued owns
+    the row now; the prefetch ends without touching it.
+    """
+    if pjob.is_prefetch and content.state != AudioContent.STATE_PENDING:
+        logger.info(f"Skipping prefetch of content {content.id}, which is already {content.state}")
+        pjob.done = pjob.superseded = True
+    return pjob.superseded
+
+
+def extract_stage(pjob):
+    """Stage 1: fetch the page and extract the article text"""
+    content = AudioContent.query.get(pjob.content_id)
+    if not content:
+        raise ValueError(f"Content {pjob.content_id} not found")
+
+    if _superseded(pjob, content):
+        return
+
+    if not pjob.is_prefetch:
+        content.state = AudioContent.STATE_PROCESSING
+        content.error = None
+        db.session.commit()
+        if content.prefetched_at:
+            # A prefetch job already extracted the text
+            return
+
+    extractor = ContentExtractor(content.url, timings=pjob.timings)
+    title, extracted_text = extractor.extract()
+
+    if not extracted_text:
+        raise ValueError("Could not extract content from the URL")
+
+    if extractor.canonical_url:
+        canonical_url = canonicalize_url(extractor.canonical_url)
+        if canonical_url != content.canonical_url:
+            duplicate = AudioContent.query.filter(AudioContent.canonical_url == canonical_url,
+                                                  AudioContent.voice == content.voice,
+                                                  AudioContent.state == AudioContent.STATE_COMPLETED,
+                                                  AudioContent.id != content.id).first()
+            content.canonical_url = canonical_url
+            # Some sites point every page's canonical link at a hub page, so the text has to match too
+            if duplicate and duplicate.original_text == extracted_text:
+                # The page is another URL for an article we already converted
+                _copy_result(duplicate, content)
+                db.session.commit()
+                pjob.done = True
+                return
+
+    content.title = title
+    content.original_text = extracted_text
+    content.content_hash = extractor.get_content_hash()
+    db.session.commit()
+
+
+def _copy_result(source, content):
+    """Give content the finished audio of source, which holds the same article"""
+    content.title = source.title
+    content.original_text = source.original_text
+    content.processed_text = source.processed_text
+    content.word_count = source.word_count
+    content.file_path = source.file_path
+    content.file_size = source.file_size
+    content.duration = source.duration
+    content.state = AudioContent.STATE_COMPLETED
+    logger.info(f"Content {content.id} is a duplicate of {source.id}; reusing its audio")
+
+
+def process_stage(pjob):
+    """Stage 2: clean the text and split it into TTS-sized chunks"""
+    content = AudioContent.query.get(pjob.content_id)
+    if _superseded(pjob, content):
+        return
+
+    previous_text = content.processed_text
+    if content.prefetched_at and content.chunk_plan and not pjob.is_prefetch:
+        pjob.chunks = content.chunk_plan
+    else:
+        processor = TextProcessor(content.original_text, content.title, timings=pjob.timings)
+        content.processed_text = processor.process()
+        content.word_count = processor.word_count
+        pjob.chunks = processor.chunks
+
+    if pjob.is_prefetch:
+        # Keep the plan so the conversion can go straight to TTS
+        content.chunk_plan = pjob.chunks
+        content.prefetched_at = datetime.utcnow()
+        db.session.commit()
+        pjob.done = True
+        return
+
+    if content.processed_text == previous_text and content.voice == pjob.voice and _audio_exists(content):
+        # A refresh found the article unchanged, so its audio still stands
+        content.state = AudioContent.STATE_COMPLETED
+        db.session.commit()
+        pjob.done = True
+        return
+
+    if pjob.job_id:
+        # Replace the admission estimate with the real TTS cost
+        Job.query.filter_by(id=pjob.job_id).update(
+            {'estimated_chars': sum(len(chunk) for chunk in pjob.chunks)},
+            synchronize_session=False
+        )
+    db.session.commit()
+
+    JobEvents().publish(pjob.content_id, 'processing', stage='process',
+                        estimated_duration=round(TextProcessor.estimate_duration(content.word_count or 0)))
+
+
+def synthesize_stage(pjob):
+    """Stage 3: convert every chunk to audio that isn't already on disk"""
+    # One directory per content, so a reclaimed job finds the chunks of the run it replaces,
+    # and a refresh those of the previous version
+    pjob.work_dir = os.path.join(current_app.config['CHUNK_WORK_FOLDER'], str(pjob.content_id))
+    os.makedirs(pjob.work_dir, exist_ok=True)
+    events = JobEvents()
+
+    def report_progress(done, total):
+        events.publish(pjob.content_id, 'processing', stage='synthesize',
+                       chunks_done=done, chunks_total=total)
+
+    converter = AudioConverter(timings=pjob.timings, base_url=current_app.config['OPENAI_BASE_URL'])
+    pjob.chunk_paths = converter.synthesize_chunks(pjob.chunks, pjob.voice, pjob.work_dir,
+                                                   on_progress=report_progress)
+
+
+def combine_stage(pjob):
+    """Stage 4: join the chunk audio into the final file and record the result"""
+    content = AudioContent.query.get(pjob.content_id)
+
+    upload_folder = current_app.config['AUDIO_UPLOAD_FOLDER']
+    folder = os.path.join(current_app.root_path, upload_folder)
+    os.makedirs(folder, exist_ok=True)
+
+    converter = AudioConverter(timings=pjob.timings)
+    audio_path = os.path.join(folder, content.filename)
+    # Build under a temporary name, so a refreshed article's old audio is served until the new one is ready
+    os.replace(converter.combine_chunks(pjob.chunk_paths, f"{audio_path}.part"), audio_path)
+
+    content.file_path = os.path.join(upload_folder, os.path.basename(audio_path))  # Relative path for web access
+    content.voice = pjob.voice
+    content.duration = converter.get_audio_duration(audio_path)
+    content.file_size = os.path.getsize(audio_path)
+    content.state = AudioContent.STATE_COMPLETED
+    db.session.commit()
+
+
+def _audio_exists(content):
+    return bool(content.file_path) and os.path.exists(os.path.join(current_app.root_path, content.file_path))
+
+
+def _cleanup(pjob, error=None):
+    """
+    Remove chunk audio a later run of the content can't use
+
+    With KEEP_CHUNK_AUDIO, a successful job keeps the chunks of the audio
+    it produced for the next refresh, and a failed one keeps everything
+    for its retry. Otherwise the directory goes as soon as the job ends.
+    """
+    if not pjob.work_dir:
+        return
+
+    if not current_app.config['KEEP_CHUNK_AUDIO']:
+        shutil.rmtree(pjob.work_dir, ignore_errors=True)
+    elif error is None:
+        current = {os.path.basename(path) for path in pjob.chunk_paths}
+        for name in os.listdir(pjob.work_dir):
+            if name not in current:
+                os.remove(os.path.join(pjob.work_dir, name))
+    pjob.work_dir = None
+
+
+def _record_error(pjob, error):
+    """Store a pipeline failure on the content row"""
+    db.session.rollback()
+    content = AudioContent.query.get(pjob.content_id)
+    if not content:
+        return
+
+    if _audio_exists(content):
+        # A failed refresh keeps serving the audio that was already there
+        logger.warning(f"Refresh of content {content.id} failed, keeping its previous audio: {str(error)}")
+        content.state = AudioContent.STATE_COMPLETED
+    else:
+        content.error = str(error)
+        content.state = AudioContent.STATE_ERROR
+    db.session.commit()
+
+
+def _save_timings(pjob):
+    """Persist the job's stage timings alongside its content row"""
+    content = AudioContent.query.get(pjob.content_id)
+    if content:
+        content.stage_timings = list(pjob.timings.records)
+        db.session.commit()
+    return content
+
+
+def _publish_result(content):
+    """Tell status subscribers that the job has finished"""
+    JobEvents().publish(content.id, content.status, error=content.error, title=content.title,
+                        duration=content.duration, word_count=content.word_count)
+
+
+class Stage:
+    """
+    A pipeline stage: a bounded input queue drained by its own pool of threads
+
+    The queue is ordered by job priority, so interactive jobs overtake
+    backfill work that is already waiting inside the pipeline.
+    """
+
+    def __init__(self, name, handler, workers, queue_size):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.input = queue.PriorityQueue(maxsize=queue_size)
+        self.next = None
+        self.threads = []
+        self._sequence = itertools.count()  # Keeps FIFO order within a priority
+
+    def put(self, pjob):
+        """Add a job to this stage's queue, blocking while it is full"""
+        self.input.put((pjob.priority, next(self._sequence), pjob))
+
+    def get(self):
+        """Take the most urgent job from this stage's queue"""
+        return self.input.get()[2]
+
+    def put_stop(self):
+        """Queue a stop sentinel behind every pending job"""
+        self.input.put((float('inf'), next(self._sequence), _STOP))
+
+    def __repr__(self):
+        return f'<Stage {self.name} workers={self.workers} queued={self.input.qsize()}>'
+
+
+class Pipeline:
+    """
+    Staged conversion pipeline: extract -> process -> synthesize -> combine.
+
+    Stages are connected by bounded queues and each stage has its own thread
+    pool, so stages from different jobs overlap. Extraction for the next job
+    runs while earlier jobs are still waiting on TTS, and a full downstream
+    queue blocks the stage in front of it instead of piling up work.
+    """
+
+    def __init__(self, app, on_success=None, on_error=None):
+        self.app = app
+        self.on_success = on_success
+        self.on_error = on_error
+
+        config = app.config
+        queue_size = config['PIPELINE_QUEUE_SIZE']
+        self.stages = [
+            # The job slots below bound the first queue, so it never blocks on submit
+            Stage('extract', extract_stage, config['PIPELINE_EXTRACT_WORKERS'], 0),
+            Stage('process', process_stage, config['PIPELINE_PROCESS_WORKERS'], queue_size),
+            Stage('synthesize', synthesize_stage, config['PIPELINE_TTS_WORKERS'], queue_size),
+            Stage('combine', combine_stage, config['PIPELINE_COMBINE_WORKERS'], queue_size),
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next = next_stage
+
+        # Bound the number of jobs inside the pipeline so callers know when to stop feeding it
+        self.capacity = pipeline_capacity(config)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+
+    def start(self):
+        """Start the threads for every stage"""
+        for stage in self.stages:
+            for i in range(stage.workers):
+                thread = threading.Thread(target=self._run_stage, args=(stage,),
+                                          name=f"{stage.name}-{i}", daemon=True)
+                thread.start()
+                stage.threads.append(thread)
+
+    def stop(self):
+        """Let in-flight jobs drain, then stop every stage thread"""
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.put_stop()
+            for thread in stage.threads:
+                thread.join()
+            stage.threads = []
+
+    def submit(self, pjob, timeout=None):
+        """
+        Add a job to the front of the pipeline
+
+        Args:
+            pjob (PipelineJob): The job to run
+            timeout (float): Seconds to wait for a free slot, None to wait forever
+
+        Returns:
+            bool: True if the job was accepted, False if the pipeline stayed full
+        """
+        if not self._slots.acquire(timeout=timeout):
+            return False
+        pjob.enqueued_at = time.monotonic()
+        self.stages[0].put(pjob)
+        return True
+
+    def has_capacity(self):
+        """Return True if a job could be submitted without blocking"""
+        if self._slots.acquire(blocking=False):
+            self._slots.release()
+            return True
+        return False
+
+    def _run_stage(self, stage):
+        while True:
+            pjob = stage.get()
+            if pjob is _STOP:
+                break
+
+            with self.app.app_context():
+                try:
+                    if not pjob.is_prefetch:
+                        JobEvents().publish(pjob.content_id, 'processing', stage=stage.name)
+                    wait = time.monotonic() - pjob.enqueued_at
+                    with pjob.timings.time(stage.name, wait=wait):
+                        stage.handler(pjob)
+                except Exception as e:
+                    logger.error(f"Error in {stage.name} stage for content {pjob.content_id}: {str(e)}")
+                    self._finish(pjob, e)
+                    continue
+
+                if stage.next is None or pjob.done:
+                    self._finish(pjob)
+
+            # Hand off outside the app context so a full queue doesn't pin a DB session
+            if stage.next is not None and not pjob.done:
+                pjob.enqueued_at = time.monotonic()
+                stage.next.put(pjob)
+
+    def _finish(self, pjob, error=None):
+        _cleanup(pjob, error)
+        try:
+            if pjob.superseded:
+                # The conversion records its own timings and result
+                if self.on_success:
+                    self.on_success(pjob)
+                return
+
+            if error is None:
+                content = _save_timings(pjob)
+                if self.on_success:
+                    self.on_success(pjob)
+            else:
+                if pjob.is_prefetch:
+                    # The content stays pending; a conversion will extract it again
+                    db.session.rollback()
+                else:
+                    _record_error(pjob, error)
+                content = _save_timings(pjob)
+                if self.on_error:
+                    self.on_error(pjob, error)
+
+            # A prefetch only has a result to announce if it found an already converted duplicate
+            if content and (not pjob.is_prefetch or content.state == AudioContent.STATE_COMPLETED):
+                _publish_result(content)
+                add_to_podcasts(content)
+        except Exception as e:
+            logger.error(f"Error finishing content {pjob.content_id}: {str(e)}")
+        finally:
+            self._slots.release()
@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from flask import current_app, render_template
+from markupsafe import Markup
+from app import db, cache
+from app.models.audio_content import AudioContent, User
+from app.models.rss_feed import RssFeed
+
+logger = logging.getLogger(__name__)
+
+# Enclosure URLs depend on the host the feed is requested from, which is
+# unknown when a worker updates the document; it is filled in per request
+BASE_URL_TOKEN = '__BLOG2AUDIO_BASE_URL__'
+
+# Serializes read-modify-write updates of a document within this process
+_update_lock = threading.Lock()
+
+
+class PodcastFeed:
+    """
+    Podcast RSS for the audio of one source feed or one user.
+
+    The rendered document lives in the app cache. It is built from the
+    database once, then kept current by add(), which the pipeline calls
+    as each job completes: the new item is rendered on its own and put in
+    front of the cached items, so serving a poll never touches the
+    database or re-renders old items. Documents expire after
+    PODCAST_CACHE_TIMEOUT and are rebuilt, which also repairs an update
+    lost to a race between worker processes.
+    """
+
+    KINDS = ('feed', 'user')
+
+    def __init__(self, kind, owner_id):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown podcast kind: {kind}")
+        self.kind = kind
+        self.owner_id = owner_id
+        self.max_items = current_app.config['PODCAST_MAX_ITEMS']
+        self.timeout = current_app.config['PODCAST_CACHE_TIMEOUT']
+
+    @classmethod
+    def for_content(cls, content):
+        """Return the podcasts a content row appears in"""
+        podcasts = []
+        if content.feed_id:
+            podcasts.append(cls('feed', content.feed_id))
+        if content.user_id:
+            podcasts.append(cls('user', content.user_id))
+        return podcasts
+
+    @property
+    def cache_key(self):
+        return f"podcast:{self.kind}:{self.owner_id}"
+
+    def document(self):
+        """
+        Return the cached document, building it on a miss
+
+        Returns:
+            dict: body, etag and last_modified, or None if the owner doesn't exist
+        """
+        document = cache.get(self.cache_key)
+        if document is None:
+            document = self._build()
+        return document
+
+    def add(self, content):
+        """
+        Put a newly completed content row at the top of the cached document
+
+        Nothing is done if the document isn't cached; the next request
+        builds it from the database, including this row.
+        """
+        with _update_lock:
+            document = cache.get(self.cache_key)
+            if document is None:
+                return
+            items = [item for item in document['items'] if item[0] != content.id]
+            items.insert(0, (content.id, self._render_item(content)))
+            self._store(document['channel'], items[:self.max_items])
+
+    def _build(self):
+        channel = self._channel()
+        if channel is None:
+            return None
+
+        contents = self._query().order_by(AudioContent.created_at.desc(), AudioContent.id.desc())\
+                                .limit(self.max_items).all()
+        return self._store(channel, [(content.id, self._render_item(content)) for content in contents])
+
+    def _store(self, channel, items):
+        built_at = datetime.now(timezone.utc).replace(microsecond=0)
+        body = render_template('podcast/channel.xml', channel=channel, built_at=built_at,
+                               items=[Markup(item) for _, item in items])
+        document = {
+            'channel': channel,
+            'items': items,
+            'body': body,
+            'etag': hashlib.md5(body.encode('utf-8')).hexdigest(),
+            'last_modified': built_at,
+        }
+        cache.set(self.cache_key, document, timeout=self.timeout)
+        return document
+
+    def _channel(self):
+        """Title, description and link of the podcast, or None if its owner doesn't exist"""
+        if self.kind == 'feed':
+            feed = db.session.query(RssFeed.title, RssFeed.url).filter(RssFeed.id == self.owner_id).first()
+            if feed is None:
+                return None
+            title = feed.title or feed.url
+            return {'title': f"{title} (Blog2Audio)", 'link': feed.url,
+                    'description': f"Audio versions of posts from {title}"}
+
+        user = db.session.query(User.username).filter(User.id == self.owner_id).first()
+        if user is None:
+            return None
+        return {'title': f"{user.username}'s Blog2Audio", 'link': BASE_URL_TOKEN + '/',
+                'description': f"Articles converted to audio by {user.username}"}
+
+    def _query(self):
+        query = AudioContent.query.options(db.load_only(
+            AudioContent.id, AudioContent.url, AudioContent.title, AudioContent.file_path,
+            AudioContent.file_size, AudioContent.duration, AudioContent.created_at
+        )).filter(AudioContent.state == AudioContent.STATE_COMPLETED, AudioContent.file_path.isnot(None))
+        if self.kind == 'feed':
+            return query.filter(AudioContent.feed_id == self.owner_id)
+        return query.filter(AudioContent.user_id == self.owner_id)
+
+    @staticmethod
+    def _render_item(content):
+        return render_template('podcast/item.xml', content=content, base_url=BASE_URL_TOKEN)
+
+
+def add_to_podcasts(content):
+    """Add a completed content row to every cached podcast it belongs to"""
+    if content.state != AudioContent.STATE_COMPLETED or not content.file_path:
+        return
+    for podcast in PodcastFeed.for_content(content):
+        try:
+            podcast.add(content)
+        except Exception as e:
+            logger.warning(f"Could not update {podcast.cache_key} with content {content.id}: {str(e)}")
@@ -0,0 +1,70 @@
+import logging
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.job import Job
+from app.models.audio_content import AudioContent
+from app.models.rss_feed import RssFeed
+
+logger = logging.getLogger(__name__)
+
+class Prefetcher:
+    """
+    Queues speculative extraction of new feed items.
+
+    A prefetch job runs the extract and process stages for a pending feed
+    item and stores its processed text and chunk plan, so when someone
+    converts the item later the pipeline goes straight to TTS. Prefetch
+    jobs have the lowest priority, never age into a higher class and are
+    not counted against the queue depth or TTS backlog. At most
+    PREFETCH_DAILY_BUDGET are queued per 24 hours and PREFETCH_MAX_QUEUED
+    wait at once; each item is prefetched at most once.
+    """
+
+    def __init__(self):
+        config = current_app.config
+        self.enabled = config['PREFETCH_ENABLED']
+        self.daily_budget = config['PREFETCH_DAILY_BUDGET']
+        self.max_queued = config['PREFETCH_MAX_QUEUED']
+        self.max_age = config['PREFETCH_MAX_AGE']
+
+    def schedule(self):
+        """
+        Queue prefetch jobs for the newest unextracted feed items, within budget
+
+        Returns:
+            int: Number of jobs queued
+        """
+        if not self.enabled:
+            return 0
+
+        now = datetime.utcnow()
+        prefetches = Job.query.filter(Job.kind == Job.KIND_PREFETCH)
+        queued = prefetches.filter(Job.status == 'queued').count()
+        spent = prefetches.filter(Job.created_at >= now - timedelta(days=1)).count()
+        room = min(self.max_queued - queued, self.daily_budget - spent)
+        if room <= 0:
+            return 0
+
+        any_job = Job.query.filter(Job.content_id == AudioContent.id).exists()
+        rows = db.session.query(AudioContent.id, AudioContent.voice)\
+                         .join(RssFeed, RssFeed.id == AudioContent.feed_id)\
+                         .filter(RssFeed.is_active.is_(True),
+                                 AudioContent.state == AudioContent.STATE_PENDING,
+                                 AudioContent.prefetched_at.is_(None),
+                                 AudioContent.created_at >= now - timedelta(seconds=self.max_age),
+                                 ~any_job)\
+                         .order_by(AudioContent.created_at.desc(), AudioContent.id.desc())\
+                         .limit(room).all()
+        if not rows:
+            return 0
+
+        db.session.add_all([
+            Job(content_id=content_id, voice=voice, priority=Job.PRIORITY_PREFETCH,
+                estimated_chars=0, kind=Job.KIND_PREFETCH)
+            for content_id, voice in rows
+        ])
+        db.session.commit()
+
+        logger.info(f"Queued {len(rows)} prefetch job(s)")
+        return len(rows)
@@ -0,0 +1,60 @@
+import logging
+from flask import current_app, session
+from app import cache
+from app.services.metrics import RESPONSE_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+def _key(route, key):
+    return f"response:{route}:{key}"
+
+
+class ResponseCache:
+    """
+    Caches responses that can't change once a job has finished.
+
+    Lookups are counted per route in the blog2audio_response_cache_lookups
+    metric, so the hit rate shows on /metrics. Entries for a content row are
+    dropped by invalidate_content whenever its job changes state.
+    """
+
+    # Routes whose entries are keyed by content ID
+    CONTENT_ROUTES = ('result',)
+
+    def __init__(self, route):
+        self.route = route
+        self.timeout = current_app.config['RESPONSE_CACHE_TIMEOUT']
+        self._bypass = False
+
+    def get(self, key):
+        """
+        Return the cached response body for key, or None
+
+        Requests with flash messages waiting skip the cache in both
+        directions, since the page they render must show those messages.
+        """
+        self._bypass = bool(session.get('_flashes'))
+        if self._bypass:
+            return None
+        value = cache.get(_key(self.route, key))
+        RESPONSE_CACHE_LOOKUPS.labels(self.route, 'miss' if value is None else 'hit').inc()
+        return value
+
+    def set(self, key, value):
+        """Store a response body built after a get() miss"""
+        if not self._bypass:
+            cache.set(_key(self.route, key), value, timeout=self.timeout)
+
+    @classmethod
+    def record(cls, route, hit):
+        """Count a lookup served by another cache, such as the status snapshots"""
+        RESPONSE_CACHE_LOOKUPS.labels(route, 'hit' if hit else 'miss').inc()
+
+    @classmethod
+    def invalidate_content(cls, content_id):
+        """Drop every cached response for a content row"""
+        try:
+            cache.delete_many(*(_key(route, content_id) for route in cls.CONTENT_ROUTES))
+        except Exception as e:
+            logger.warning(f"Could not invalidate cached responses for content {content_id}: {str(e)}")
@@ -1,15 +1,73 @@
 import feedparser
-import hashlib
-from datetime import datetime, timedelta
-from urllib.parse import urlparse
+import requests
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
 import logging
 from app import db
+from app.config import Config
 from app.models.rss_feed import RssFeed
 from app.models.audio_content import AudioContent
-from app.services.content_extractor import ContentExtractor
+from app.services.pagination import keyset_page
+from app.services.url_canonicalizer import canonicalize_url
+from app.services.feed_schedule import parse_skip_hours, schedule_next_poll
+from app.services.websub import WebSubManager, discover_hub
 
 logger = logging.getLogger(__name__)
 
+FEED_HEADERS = {
+    'User-Agent': 'Blog2Audio feed reader (+https://github.com/lheitman0/blog2audio)',
+    'Accept': 'application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.8',
+}
+
+
+def download_feed(url, etag=None, modified=None, timeout=None):
+    """
+    Download and parse a feed, sending the validators from the last poll
+    
+    Args:
+        url (str): URL of the feed
+        etag (str, optional): ETag saved from the last full response
+        modified (str, optional): Last-Modified header saved from the last full response
+        timeout (float, optional): Connect and read timeout (default: Config.RSS_FETCH_TIMEOUT)
+        
+    Returns:
+        FeedParserDict: The parsed feed with status, etag, modified, headers and
+                        skip_hours set; a 304 response has status 304 and no entries
+        
+    Raises:
+        requests.RequestException: If the feed could not be downloaded
+    """
+    headers = dict(FEED_HEADERS)
+    if etag:
+        headers['If-None-Match'] = etag
+    if modified:
+        headers['If-Modified-Since'] = modified
+    
+    response = requests.get(url, headers=headers, timeout=timeout or Config.RSS_FETCH_TIMEOUT)
+    response_headers = {key.lower(): value for key, value in response.headers.items()}
+    if response.status_code == 304:
+        return feedparser.FeedParserDict(status=304, feed=feedparser.FeedParserDict(), entries=[],
+                                         etag=etag, modified=modified, headers=response_headers)
+    response.raise_for_status()
+    
+    feed_data = feedparser.parse(response.content, response_headers=response_headers)
+    feed_data['status'] = response.status_code
+    feed_data['etag'] = response.headers.get('ETag')
+    feed_data['modified'] = response.headers.get('Last-Modified')
+    feed_data['skip_hours'] = parse_skip_hours(response.content)
+    return feed_data
+
+
+def _insert_skipping_conflicts(model):
+    """Return an INSERT for model that leaves out rows clashing with a unique key"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(model).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        return postgresql.insert(model).on_conflict_do_nothing()
+    return db.insert(model)
+
+
 class RssService:
     """Service for managing RSS feeds and fetching content"""
     
@@ -28,7 +86,11 @@ class RssService:
             RssFeed: The created feed object
         """
         # Parse feed to get initial metadata
-        feed_data = feedparser.parse(url)
+        try:
+            feed_data = download_feed(url)
+        except requests.RequestException as e:
+            logger.error(f"Error downloading feed {url}: {str(e)}")
+            raise ValueError(f"Could not fetch feed: {url}")
         
         if feed_data.bozo:  # feedparser sets bozo to 1 if there's an error
             logger.error(f"Error parsing feed {url}: {feed_data.bozo_exception}")
@@ -49,21 +111,30 @@ class RssService:
         db.session.add(new_feed)
         db.session.commit()
         
-        # Process initial entries
-        self.fetch_feed_content(new_feed.id, max_entries=5)
+        # Process initial entries from the document we already have
+        self.fetch_feed_content(new_feed.id, max_entries=5, feed_data=feed_data)
+        
+        # Ask the feed's hub, if it has one, to push new posts instead of waiting for polls
+        if new_feed.hub_url:
+            WebSubManager().subscribe(new_feed)
         
         return new_feed
     
-    def fetch_feed_content(self, feed_id, max_entries=10):
+    def fetch_feed_content(self, feed_id, max_entries=10, feed_data=None):
         """
         Fetch content from an RSS feed and create AudioContent entries
         
+        The feed is requested with the ETag and Last-Modified values saved
+        from the previous poll, so an unchanged feed costs a 304 response
+        instead of a download and parse.
+        
         Args:
             feed_id (int): ID of the feed to process
             max_entries (int): Maximum entries to process
+            feed_data (optional): Already parsed feed document to use instead of fetching
             
         Returns:
-            list: List of created AudioContent objects
+            list: Column values of the created AudioContent rows
         """
         feed = RssFeed.query.get(feed_id)
         if not feed:
@@ -75,80 +146,211 @@ class RssService:
             return []
         
         try:
-            # Parse feed
-            feed_data = feedparser.parse(feed.url)
-            
-            # Update feed metadata
-            feed.last_checked = datetime.utcnow()
-            feed.title = feed_data.feed.get('title', feed.title)
-            
-            if hasattr(feed_data.feed, 'updated_parsed') and feed_data.feed.updated_parsed:
-                feed.last_updated = datetime(*feed_data.feed.updated_parsed[:6])
+            # Parse feed, unless the server says it hasn't changed
+            if feed_data is None:
+                feed_data = download_feed(feed.url, feed.etag, feed.modified)
             
-            # Process entries
-            new_contents = []
-            entries_processed = 0
-            
-            for entry in feed_data.entries[:max_entries]:
-                # Skip if we've hit our limit
-                if entries_processed >= max_entries:
-                    break
-                
-                # Get the link to the full content
-                if hasattr(entry, 'link') and entry.link:
-                    link = entry.link
-                    
-                    # Check if we already have this content
-                    existing = AudioContent.query.filter_by(url=link).first()
-                    if existing:
-                        logger.debug(f"Content already exists: {link}")
-                        continue
-                    
-                    # Create new content entry
-                    title = entry.get('title', None)
-                    
-                    new_content = AudioContent(
-                        url=link,
-                        title=title,
-                        user_id=feed.user_id,
-                        feed_id=feed.id
-                    )
-                    
-                    db.session.add(new_content)
-                    new_contents.append(new_content)
-                    entries_processed += 1
-            
-            # Reset error count on successful fetch
-            feed.error_count = 0
+            new_rows = self.apply_feed_data(feed, feed_data, max_entries)
             db.session.commit()
-            
-            return new_contents
+            return new_rows
             
         except Exception as e:
             logger.error(f"Error fetching feed {feed.url}: {str(e)}")
-            
-            # Increment error count
-            feed.error_count += 1
+            db.session.rollback()
+            self.record_feed_error(feed)
             db.session.commit()
             
             return []
     
+    def apply_feed_data(self, feed, feed_data, max_entries=10):
+        """
+        Update a feed from a downloaded document and add its new entries
+        
+        Changes are left in the session for the caller to commit. The
+        feed's next poll is scheduled from what the document shows.
+        
+        Args:
+            feed (RssFeed): The feed that was polled
+            feed_data (FeedParserDict): Result of download_feed
+            max_entries (int): Maximum entries to process
+            
+        Returns:
+            list: Column values of the created AudioContent rows
+        """
+        feed.last_checked = datetime.utcnow()
+        if feed_data.get('status') == 304:
+            logger.debug(f"Feed not modified: {feed.url}")
+            feed.error_count = 0
+            schedule_next_poll(feed, feed_data, feed.last_checked)
+            return []
+        
+        # Update feed metadata
+        feed.title = feed_data.feed.get('title', feed.title)
+        
+        if hasattr(feed_data.feed, 'updated_parsed') and feed_data.feed.updated_parsed:
+            feed.last_updated = datetime(*feed_data.feed.updated_parsed[:6])
+        
+        # Feeds can start (or stop) advertising a WebSub hub at any time
+        feed.hub_url, feed.hub_topic = discover_hub(feed_data, feed.url)
+        
+        new_rows = self.ingest_entries(feed, feed_data.entries, max_entries)
+        
+        # Reset error count on successful fetch; validators are only kept once
+        # the entries are saved, so a failed poll is fetched in full next time
+        feed.etag = feed_data.get('etag')
+        feed.modified = feed_data.get('modified')
+        feed.error_count = 0
+        schedule_next_poll(feed, feed_data, feed.last_checked)
+        
+        return new_rows
+    
+    def ingest_entries(self, feed, feed_entries, max_entries=10):
+        """
+        Add the entries of a feed document that aren't stored yet
+        
+        Used for polled documents and for documents pushed by a WebSub
+        hub. Changes are left in the session for the caller to commit.
+        
+        Args:
+            feed (RssFeed): The feed the entries belong to
+            feed_entries (list): Parsed feedparser entries
+            max_entries (int): Maximum entries to process
+            
+        Returns:
+            list: Column values of the created AudioContent rows
+        """
+        # Collect entries with a link to the full content
+        entries = []
+        for entry in feed_entries[:max_entries]:
+            if entry.get('link'):
+                entries.append((entry.link, canonicalize_url(entry.link), entry.get('id') or entry.link,
+                                entry.get('title', None)))
+        
+        # One query finds entries we already have, under any variant of their URL
+        # or, for this feed, under their GUID even if the link has changed since
+        known_urls, known_guids = self._known_entries(feed, entries)
+        
+        new_rows = []
+        for link, canonical_url, guid, title in entries:
+            if canonical_url in known_urls or guid in known_guids:
+                logger.debug(f"Content already exists: {link}")
+                continue
+            known_urls.add(canonical_url)
+            known_guids.add(guid)
+            
+            new_rows.append(AudioContent.new_row(
+                url=link,
+                title=title,
+                user_id=feed.user_id,
+                voice=Config.DEFAULT_VOICE,
+                feed_id=feed.id,
+                feed_guid=guid
+            ))
+        
+        # One executemany for all new entries; a poll and a WebSub push of the
+        # same feed can race here, so rows the other one stored first are skipped
+        if new_rows:
+            inserted = set(db.session.execute(
+                _insert_skipping_conflicts(AudioContent).returning(AudioContent.claim_key), new_rows
+            ).scalars())
+            new_rows = [row for row in new_rows if row['claim_key'] in inserted]
+        
+        return new_rows
+    
+    def _known_entries(self, feed, entries):
+        """
+        Look up which of a feed's entries are already stored
+        
+        Args:
+            feed (RssFeed): The feed the entries came from
+            entries (list): (link, canonical_url, guid, title) tuples
+            
+        Returns:
+            tuple: (set of known canonical URLs, set of known GUIDs for this feed)
+        """
+        if not entries:
+            return set(), set()
+        
+        canonical_urls = list({canonical_url for _, canonical_url, _, _ in entries})
+        guids = list({guid for _, _, guid, _ in entries})
+        rows = db.session.query(AudioContent.canonical_url, AudioContent.feed_id, AudioContent.feed_guid)\
+                         .filter(db.or_(AudioContent.canonical_url.in_(canonical_urls),
+                                        db.and_(AudioContent.feed_id == feed.id,
+                                                AudioContent.feed_guid.in_(guids)))).all()
+        
+        known_urls = {row.canonical_url for row in rows}
+        known_guids = {row.feed_guid for row in rows if row.feed_id == feed.id and row.feed_guid}
+        return known_urls, known_guids
+    
+    def record_feed_error(self, feed):
+        """Count a failed poll against a feed and back off its schedule; the caller commits"""
+        feed.last_checked = datetime.utcnow()
+        feed.error_count = (feed.error_count or 0) + 1
+        schedule_next_poll(feed, None, feed.last_checked)
+    
     def process_all_feeds(self):
         """
         Process all active feeds to fetch new content
         
+        Only feeds whose next_poll_at has passed are polled; they are
+        downloaded concurrently by FeedPoller.
+        
         Returns:
             int: Count of new content items created
         """
-        active_feeds = RssFeed.query.filter_by(is_active=True).all()
-        new_item_count = 0
+        # Imported here because the poller builds on this service
+        from app.services.feed_poller import FeedPoller
         
-        for feed in active_feeds:
-            # Skip feeds that have been checked recently (< 30 min ago)
-            if feed.last_checked and (datetime.utcnow() - feed.last_checked < timedelta(minutes=30)):
-                continue
-                
-            items = self.fetch_feed_content(feed.id)
-            new_item_count += len(items)
+        due_feeds = RssFeed.query.filter(RssFeed.is_active.is_(True),
+                                         db.or_(RssFeed.next_poll_at.is_(None),
+                                                RssFeed.next_poll_at <= datetime.utcnow()))\
+                                 .order_by(RssFeed.next_poll_at).all()
+        
+        return FeedPoller().poll(due_feeds)
+    
+    def next_poll_time(self):
+        """
+        Return when the next active feed is due
         
-        return new_item_count
\ No newline at end of file
+        Returns:
+            datetime: Earliest next_poll_at, or None if there are no active feeds
+        """
+        due = db.session.query(RssFeed.next_poll_at, RssFeed.id).filter(RssFeed.is_active.is_(True))\
+                        .order_by(RssFeed.next_poll_at.is_(None).desc(), RssFeed.next_poll_at).first()
+        if due is None:
+            return None
+        return due.next_poll_at or datetime.utcnow()
+    
+    def list_feeds(self, cursor=None, per_page=None):
+        """
+        Return one page of feeds, newest first
+        
+        Args:
+            cursor (str, optional): Cursor returned with the previous page
+            per_page (int, optional): Page size (default: Config.RSS_PAGE_SIZE)
+            
+        Returns:
+            tuple: (feeds, next_cursor)
+        """
+        query = RssFeed.query.options(db.load_only(
+            RssFeed.id, RssFeed.url, RssFeed.title, RssFeed.last_checked,
+            RssFeed.error_count, RssFeed.is_active, RssFeed.created_at
+        ))
+        return keyset_page(query, RssFeed, cursor, per_page or Config.RSS_PAGE_SIZE)
+    
+    def list_feed_content(self, cursor=None, per_page=None):
+        """
+        Return one page of feed items, newest first
+        
+        Args:
+            cursor (str, optional): Cursor returned with the previous page
+            per_page (int, optional): Page size (default: Config.RSS_PAGE_SIZE)
+            
+        Returns:
+            tuple: (contents, next_cursor)
+        """
+        query = AudioContent.query.options(
+            AudioContent.summary_only(),
+            db.joinedload(AudioContent.feed).load_only(RssFeed.title)
+        ).filter(AudioContent.feed_id.isnot(None))
+        return keyset_page(query, AudioContent, cursor, per_page or Config.RSS_PAGE_SIZE)
\ No newline at end of file
@@ -1,10 +1,12 @@
 import re
+import hashlib
 import nltk
 from nltk.tokenize import sent_tokenize
 from langdetect import detect
 import logging
 from bs4 import BeautifulSoup
 from app.config import Config
+from app.services.metrics import StageTimings
 import ssl
 
 # Fix SSL certificate issues for NLTK
@@ -28,13 +30,14 @@ class TextProcessor:
     Service for processing and preparing text for text-to-speech conversion
     """
     
-    def __init__(self, text, title=None):
+    def __init__(self, text, title=None, timings=None):
         self.original_text = text
         self.title = title
         self.processed_text = None
         self.language = None
         self.chunks = []
         self.word_count = 0
+        self.timings = timings or StageTimings()
     
     def process(self):
         """
@@ -44,13 +47,16 @@ class TextProcessor:
             return None
             
         # Step 1: Basic cleaning
-        text = self._basic_clean(self.original_text)
+        with self.timings.time('clean', chars=len(self.original_text)):
+            text = self._basic_clean(self.original_text)
         
         # Step 2: Detect language
-        self.language = self._detect_language(text)
+        with self.timings.time('detect_language', chars=min(len(text), 1000)):
+            self.language = self._detect_language(text)
         
         # Step 3: Format text for better speech
-        text = self._format_for_speech(text)
+        with self.timings.time('format', chars=len(text)):
+            text = self._format_for_speech(text)
         
         # Step 4: Add title if available
         if self.title:
@@ -60,7 +66,8 @@ class TextProcessor:
         self.word_count = len(text.split())
         
         # Step 6: Split into chunks if needed
-        self.chunks = self._split_into_chunks(text)
+        with self.timings.time('tokenize', chars=len(text)):
+            self.chunks = self._split_into_chunks(text)
         
         # Store processed text
         self.processed_text = text
@@ -147,6 +154,11 @@ class TextProcessor:
         """
         Split text into manageable chunks for TTS processing
         Respects sentence boundaries
+
+        Boundaries depend on the sentences, not on their position: once a
+        chunk holds CHUNK_MIN_LENGTH characters it ends after any sentence
+        that _is_boundary picks. An edit to the article then only changes
+        the chunks around it, and the audio of the others can be reused.
         """
         max_length = Config.MAX_TEXT_LENGTH
         
@@ -166,6 +178,10 @@ class TextProcessor:
                 current_chunk = sentence + " "
             else:
                 current_chunk += sentence + " "
+            
+            if len(current_chunk) >= Config.CHUNK_MIN_LENGTH and self._is_boundary(sentence):
+                chunks.append(current_chunk.strip())
+                current_chunk = ""
         
         # Add the last chunk if it exists
         if current_chunk:
@@ -173,11 +189,24 @@ class TextProcessor:
         
         return chunks
     
+    @staticmethod
+    def _is_boundary(sentence):
+        """Return True for about one sentence in CHUNK_BOUNDARY_ODDS, chosen by a hash of its text"""
+        digest = hashlib.md5(sentence.encode('utf-8')).digest()
+        return int.from_bytes(digest[:4], 'big') % Config.CHUNK_BOUNDARY_ODDS == 0
+    
     def get_estimated_duration(self):
         """
         Estimate audio duration based on word count
+        """
+        return self.estimate_duration(self.word_count)
+
+    @staticmethod
+    def estimate_duration(word_count):
+        """
+        Estimate audio duration for a number of words
         Assumes average speaking rate of 150 words per minute
         """
         words_per_minute = 150
-        minutes = self.word_count / words_per_minute
+        minutes = word_count / words_per_minute
         return minutes * 60  # Return seconds
\ No newline at end of file
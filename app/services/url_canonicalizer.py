@@ -0,0 +1,139 @@
+import re
+from itertools import zip_longest
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'oly_anon_id', 'oly_enc_id',
+    'vero_id', 'ref', 'ref_src', 'ref_url', 'cmpid', 'spm', 'amp', 'outputtype',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_', 'stm_')
+
+# AMP caches wrap the original URL: https://example-com.cdn.ampproject.org/c/s/example.com/post
+_AMP_CACHE_PATH = re.compile(r'^/[a-z]/(s/)?(?P<rest>.+)$')
+_AMP_PATH_SUFFIX = re.compile(r'/amp/?$')
+
+
+def canonicalize_url(url):
+    """
+    Reduce a URL to the form used to detect duplicate submissions
+
+    Variants that serve the same article map to one string: the scheme is
+    always https, host case, a leading www. or amp. and default ports are
+    dropped, tracking parameters and fragments are removed, the remaining
+    query parameters are sorted, AMP URLs (including AMP cache links) point
+    back to the article, and trailing slashes are removed.
+
+    The result is a dedup key, not necessarily a fetchable URL; the
+    submitted URL is still the one that gets fetched.
+
+    Args:
+        url (str): URL as submitted
+
+    Returns:
+        str: Canonical form of the URL
+    """
+    url = _unwrap_amp_cache(url.strip())
+    parts = urlsplit(url)
+
+    host = (parts.hostname or '').lower().rstrip('.')
+    for prefix in ('www.', 'amp.', 'm.'):
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    port = _port(parts)
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    path = _AMP_PATH_SUFFIX.sub('', path)
+    if path.endswith('.amp'):
+        path = path[:-len('.amp')]
+    for index in ('/index.html', '/index.htm', '/index.php'):
+        if path.endswith(index):
+            path = path[:-len(index) + 1]
+    path = path.rstrip('/') or '/'
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(key)
+    )
+
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def is_valid_url(url):
+    """
+    Check that a submitted URL can be fetched and canonicalized
+
+    Args:
+        url: Value submitted as a URL
+
+    Returns:
+        bool: True for an http(s) URL with a host and, if given, a numeric port
+    """
+    if not isinstance(url, str):
+        return False
+    try:
+        parts = urlsplit(url.strip())
+        parts.port  # Raises ValueError for a port that isn't a number in range
+    except ValueError:
+        return False
+    return parts.scheme in ('http', 'https') and bool(parts.hostname)
+
+
+def interleave_by_host(items):
+    """
+    Order items round-robin by the host of their URL
+
+    Used so one site's URLs don't take every fetch slot at once.
+
+    Args:
+        items (list): Objects with a url attribute
+
+    Returns:
+        list: The same items, keeping their relative order within each host
+    """
+    by_host = {}
+    for item in items:
+        by_host.setdefault(urlsplit(item.url).netloc, []).append(item)
+
+    ordered = []
+    for group in zip_longest(*by_host.values()):
+        ordered.extend(item for item in group if item is not None)
+    return ordered
+
+
+def _port(parts):
+    """Return the URL's port, or its raw text if it isn't a valid number"""
+    try:
+        return parts.port
+    except ValueError:
+        # Still a usable dedup key; fetching such a URL fails later with a normal error
+        return parts.netloc.rpartition(':')[2]
+
+
+def _is_tracking_param(key):
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def _unwrap_amp_cache(url):
+    """Return the article URL behind a Google AMP cache or AMP viewer link"""
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+
+    if host.endswith('.cdn.ampproject.org'):
+        match = _AMP_CACHE_PATH.match(parts.path)
+        if match:
+            scheme = 'https' if match.group(1) else 'http'
+            return f"{scheme}://{unquote(match.group('rest'))}"
+
+    if host in ('www.google.com', 'google.com') and parts.path.startswith('/amp/'):
+        rest = parts.path[len('/amp/'):]
+        if rest.startswith('s/'):
+            return f"https://{unquote(rest[2:])}"
+        return f"http://{unquote(rest)}"
+
+    return url
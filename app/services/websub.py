@@ -0,0 +1,165 @@
+import hmac
+import secrets
+import hashlib
+import logging
+from datetime import datetime, timedelta
+import requests
+from requests.utils import parse_header_links
+from app import db
+from app.config import Config
+from app.models.rss_feed import RssFeed
+
+logger = logging.getLogger(__name__)
+
+# Digest names a hub may use in X-Hub-Signature
+SIGNATURE_METHODS = {'sha1': hashlib.sha1, 'sha256': hashlib.sha256,
+                     'sha384': hashlib.sha384, 'sha512': hashlib.sha512}
+
+
+def discover_hub(feed_data, feed_url):
+    """
+    Find the WebSub hub a feed advertises
+
+    Hubs are announced with rel="hub" links in the feed document or in
+    the HTTP Link header; the topic is the feed's rel="self" URL.
+
+    Args:
+        feed_data (FeedParserDict): Result of download_feed
+        feed_url (str): URL the feed was fetched from
+
+    Returns:
+        tuple: (hub_url, topic_url), or (None, None) if the feed has no hub
+    """
+    links = [(link.get('rel'), link.get('href')) for link in feed_data.get('feed', {}).get('links', [])]
+    link_header = (feed_data.get('headers') or {}).get('link')
+    if link_header:
+        links += [(link.get('rel'), link.get('url')) for link in parse_header_links(link_header)]
+
+    hubs = [href for rel, href in links if rel == 'hub' and href]
+    if not hubs:
+        return None, None
+    topics = [href for rel, href in links if rel == 'self' and href]
+    return hubs[0], topics[0] if topics else feed_url
+
+
+def verify_signature(secret, body, header):
+    """
+    Check the X-Hub-Signature of a pushed document
+
+    Args:
+        secret (str): Secret sent with the subscription request
+        body (bytes): Raw request body
+        header (str): X-Hub-Signature value, e.g. "sha256=<hex digest>"
+
+    Returns:
+        bool: True if the body was signed with the secret
+    """
+    method, _, signature = (header or '').partition('=')
+    digest = SIGNATURE_METHODS.get(method.lower())
+    if not secret or digest is None or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, digest).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+class WebSubManager:
+    """
+    Manages WebSub (PubSubHubbub) subscriptions for feeds that have a hub.
+
+    Subscribing only sends the request; the hub then confirms it by
+    calling the callback in app.routes.websub, which records the lease.
+    Leases are renewed by renew_subscriptions before they run out, and
+    feeds with a live lease are polled only as a safety net
+    (WEBSUB_POLL_INTERVAL). Nothing is done unless
+    WEBSUB_CALLBACK_BASE_URL names the app's public address.
+    """
+
+    def __init__(self):
+        self.callback_base_url = (Config.WEBSUB_CALLBACK_BASE_URL or '').rstrip('/')
+        self.lease_seconds = Config.WEBSUB_LEASE_SECONDS
+        self.timeout = Config.RSS_FETCH_TIMEOUT
+
+    @property
+    def enabled(self):
+        return bool(self.callback_base_url)
+
+    def callback_url(self, feed):
+        return f"{self.callback_base_url}/websub/callback/{feed.id}"
+
+    def subscribe(self, feed):
+        """
+        Ask the feed's hub to push new entries; the caller's session is committed
+
+        Returns:
+            bool: True if the hub accepted the request for verification
+        """
+        if not self.enabled or not feed.hub_url:
+            return False
+
+        feed.hub_secret = feed.hub_secret or secrets.token_hex(20)
+        feed.hub_requested_at = datetime.utcnow()
+        db.session.commit()
+        return self._request(feed, 'subscribe', {
+            'hub.lease_seconds': str(self.lease_seconds),
+            'hub.secret': feed.hub_secret,
+        })
+
+    def unsubscribe(self, feed):
+        """
+        Ask the feed's hub to stop pushing; the caller's session is committed
+
+        The lease is cleared before the request goes out, since some hubs
+        verify the intent before they even answer it.
+
+        Returns:
+            bool: True if the hub accepted the request for verification
+        """
+        if not self.enabled or not feed.hub_url or not feed.hub_lease_expires:
+            return False
+        feed.hub_lease_expires = None
+        db.session.commit()
+        return self._request(feed, 'unsubscribe', {})
+
+    def renew_subscriptions(self):
+        """
+        Subscribe feeds whose lease is missing or about to run out
+
+        Feeds with a request still awaiting verification are skipped for
+        WEBSUB_RETRY_INTERVAL.
+
+        Returns:
+            int: Number of subscription requests the hubs accepted
+        """
+        if not self.enabled:
+            return 0
+
+        now = datetime.utcnow()
+        feeds = RssFeed.query.filter(
+            RssFeed.is_active.is_(True),
+            RssFeed.hub_url.isnot(None),
+            db.or_(RssFeed.hub_lease_expires.is_(None),
+                   RssFeed.hub_lease_expires < now + timedelta(seconds=Config.WEBSUB_RENEW_MARGIN)),
+            db.or_(RssFeed.hub_requested_at.is_(None),
+                   RssFeed.hub_requested_at < now - timedelta(seconds=Config.WEBSUB_RETRY_INTERVAL))
+        ).all()
+        return sum(self.subscribe(feed) for feed in feeds)
+
+    def _request(self, feed, mode, params):
+        data = {
+            'hub.mode': mode,
+            'hub.topic': feed.hub_topic or feed.url,
+            'hub.callback': self.callback_url(feed),
+            **params,
+        }
+        try:
+            response = requests.post(feed.hub_url, data=data, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning(f"WebSub {mode} request to {feed.hub_url} failed: {str(e)}")
+            return False
+
+        if response.status_code not in (200, 202, 204):
+            logger.warning(f"WebSub hub {feed.hub_url} refused {mode} for {feed.url}: "
+                           f"{response.status_code} {response.text[:200]}")
+            return False
+        logger.info(f"WebSub {mode} requested for {feed.url} at {feed.hub_url}")
+        return True
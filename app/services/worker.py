@@ -0,0 +1,118 @@
+import os
+import signal
+import socket
+import time
+import logging
+import threading
+from app.services.job_queue import JobQueue
+from app.services.pipeline import Pipeline, PipelineJob
+
+logger = logging.getLogger(__name__)
+
+class Worker:
+    """
+    Job queue worker that claims jobs from the database and feeds them
+    through the conversion pipeline outside of the web process
+    """
+
+    def __init__(self, app, worker_id=None):
+        self.app = app
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = app.config['WORKER_POLL_INTERVAL']
+        self.heartbeat_interval = app.config['JOB_HEARTBEAT_INTERVAL']
+        self.reap_interval = app.config['JOB_REAP_INTERVAL']
+        self.pipeline = Pipeline(app, on_success=self._job_succeeded, on_error=self._job_failed)
+        self._stopping = False
+        self._active = set()  # IDs of claimed jobs still in the pipeline
+        self._active_lock = threading.Lock()
+        self._heartbeat_stop = threading.Event()
+
+    def stop(self, *args):
+        """Stop claiming new jobs; in-flight jobs are allowed to finish"""
+        logger.info(f"Worker {self.worker_id} stopping")
+        self._stopping = True
+
+    def run(self):
+        """Poll the queue and feed jobs to the pipeline until stopped"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.pipeline.start()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name='heartbeat', daemon=True)
+        heartbeat.start()
+        logger.info(f"Worker {self.worker_id} started with pipeline capacity {self.pipeline.capacity}")
+
+        next_reap = time.monotonic()
+        while not self._stopping:
+            if time.monotonic() >= next_reap:
+                self.reap()
+                next_reap = time.monotonic() + self.reap_interval
+
+            # Only claim work we can start right away; the rest stays visible to other workers
+            if not self.pipeline.has_capacity():
+                time.sleep(0.1)
+                continue
+            if not self.run_once():
+                time.sleep(self.poll_interval)
+
+        # Keep renewing leases until in-flight jobs have drained
+        self.pipeline.stop()
+        self._heartbeat_stop.set()
+        heartbeat.join()
+
+    def run_once(self):
+        """
+        Claim a single job and submit it to the pipeline
+
+        Returns:
+            bool: True if a job was claimed, False if the queue was empty
+        """
+        with self.app.app_context():
+            job = JobQueue().claim(self.worker_id)
+            if not job:
+                return False
+
+            logger.info(f"Worker {self.worker_id} claimed job {job.id} (attempt {job.attempts})")
+            with self._active_lock:
+                self._active.add(job.id)
+            pjob = PipelineJob(job.content_id, job.voice, job_id=job.id, priority=job.priority,
+                               kind=job.kind)
+            pjob.timings.add('queue_wait', (job.started_at - job.created_at).total_seconds())
+
+        self.pipeline.submit(pjob)
+        return True
+
+    def reap(self):
+        """Requeue jobs whose workers stopped renewing their leases"""
+        with self.app.app_context():
+            try:
+                requeued = JobQueue().reap_expired()
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} failed to reap expired jobs: {str(e)}")
+                return
+        if requeued:
+            logger.info(f"Worker {self.worker_id} requeued {requeued} abandoned job(s)")
+
+    def _heartbeat_loop(self):
+        """Renew the leases of in-flight jobs until the worker has stopped"""
+        while not self._heartbeat_stop.wait(self.heartbeat_interval):
+            with self._active_lock:
+                job_ids = list(self._active)
+            with self.app.app_context():
+                try:
+                    JobQueue().heartbeat(self.worker_id, job_ids)
+                except Exception as e:
+                    # A missed beat is fine as long as the next one lands before the lease expires
+                    logger.error(f"Worker {self.worker_id} heartbeat failed: {str(e)}")
+
+    def _release(self, pjob):
+        with self._active_lock:
+            self._active.discard(pjob.job_id)
+
+    def _job_succeeded(self, pjob):
+        self._release(pjob)
+        JobQueue().complete(pjob.job_id, self.worker_id)
+
+    def _job_failed(self, pjob, error):
+        self._release(pjob)
+        JobQueue().fail(pjob.job_id, self.worker_id, str(error))
@@ -0,0 +1,13 @@
+"""
+Gunicorn settings, read automatically by `gunicorn wsgi:application`
+
+Status streams (/events/<id>) stay open for up to SSE_MAX_STREAM_SECONDS,
+so a sync worker would be tied up by a single open processing page.
+Threaded workers serve one stream per thread instead.
+"""
+import os
+
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')  # 'gevent' also works
+threads = int(os.getenv('GUNICORN_THREADS', 32))  # Concurrent requests, open streams included, per worker
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
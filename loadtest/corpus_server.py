@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Local web server with blog posts and RSS feeds to convert
+
+Stands in for the sites the app fetches during load tests, so a run needs no
+network and always sees the same pages:
+
+- GET /posts/<n>.html: a blog post, generated from --seed and n, so the same
+  post has the same text in every run
+- GET /feeds/<n>.xml: an RSS 2.0 feed of the newest --items posts of feed n;
+  a new post appears in every feed every --post-interval seconds
+- GET /<path> with --corpus: files saved in that directory are served as is
+  (.html as text/html, .xml as application/rss+xml), ahead of generated ones
+
+Responses carry an ETag and answer If-None-Match with 304, like most feed
+servers. --save writes a generated corpus to a directory instead of serving,
+for editing or for pinning a corpus across app versions.
+
+Usage:
+    python loadtest/corpus_server.py --port 8901
+    python loadtest/corpus_server.py --save loadtest/corpus --posts 200 --feeds 10
+    python loadtest/corpus_server.py --port 8901 --corpus loadtest/corpus
+"""
+import os
+import re
+import time
+import random
+import hashlib
+import argparse
+from email.utils import formatdate
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    'system data model server request latency cache queue worker thread process memory disk network '
+    'article reader writer editor feed podcast audio voice speech text sentence paragraph chapter '
+    'design build deploy release review change version update measure profile benchmark result '
+    'simple careful quick small large early later often rarely usually clearly probably certainly '
+    'the a an of to in for on with at by from about into over after before between under'
+).split()
+
+_POST_PATH = re.compile(r'^/posts/(\d+)\.html$')
+_FEED_PATH = re.compile(r'^/feeds/(\d+)\.xml$')
+
+
+class Corpus:
+    """Deterministic blog posts and the feeds that list them"""
+
+    def __init__(self, base_url, seed=0, feeds=10, items=20, post_interval=60.0, min_words=300, max_words=3000):
+        self.base_url = base_url.rstrip('/')
+        self.seed = seed
+        self.feeds = feeds
+        self.items = items
+        self.post_interval = post_interval
+        self.min_words = min_words
+        self.max_words = max_words
+        self.started = time.time()
+
+    def post(self, n):
+        """Return the HTML of post n"""
+        rng = random.Random(f"{self.seed}-post-{n}")
+        words = rng.randint(self.min_words, self.max_words)
+        paragraphs, count = [], 0
+        while count < words:
+            sentences = [self._sentence(rng) for _ in range(rng.randint(3, 7))]
+            count += sum(len(sentence.split()) for sentence in sentences)
+            paragraphs.append(' '.join(sentences))
+
+        body = '\n'.join(f"<p>{escape(paragraph)}</p>" for paragraph in paragraphs)
+        title = self.title(n)
+        return (
+            f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{escape(title)}</title>"
+            f"<link rel=\"canonical\" href=\"{self.base_url}/posts/{n}.html\"></head>\n"
+            f"<body><nav><a href=\"/\">Home</a> <a href=\"/about\">About</a></nav>\n"
+            f"<article><h1>{escape(title)}</h1>\n{body}\n</article>\n"
+            f"<footer>Comments are closed.</footer></body></html>\n"
+        )
+
+    def feed(self, n):
+        """Return the RSS document of feed n as it looks right now"""
+        # The feed's i-th post is post n + feeds * i, published post_interval after the one before
+        published = self.items + int((time.time() - self.started) / self.post_interval)
+        items = '\n'.join(self._item(n + self.feeds * i, self.started + (i - self.items + 1) * self.post_interval)
+                          for i in range(published - 1, published - self.items - 1, -1))
+        return (
+            f"<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<rss version=\"2.0\"><channel>"
+            f"<title>Load Test Blog {n}</title><link>{self.base_url}/</link>"
+            f"<description>Generated posts for load testing</description>\n{items}\n</channel></rss>\n"
+        )
+
+    def _item(self, post, published_at):
+        return (
+            f"<item><title>{escape(self.title(post))}</title><link>{self.base_url}/posts/{post}.html</link>"
+            f"<guid isPermaLink=\"false\">post-{post}</guid>"
+            f"<pubDate>{formatdate(published_at, usegmt=True)}</pubDate></item>"
+        )
+
+    def title(self, n):
+        rng = random.Random(f"{self.seed}-title-{n}")
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))).capitalize()
+
+    @staticmethod
+    def _sentence(rng):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 24))]
+        return ' '.join(words).capitalize() + rng.choice('....?!')
+
+    def save(self, directory, posts):
+        """Write posts 0..posts-1 and every feed to directory"""
+        os.makedirs(os.path.join(directory, 'posts'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'feeds'), exist_ok=True)
+        for n in range(posts):
+            with open(os.path.join(directory, 'posts', f"{n}.html"), 'w', encoding='utf-8') as f:
+                f.write(self.post(n))
+        for n in range(self.feeds):
+            with open(os.path.join(directory, 'feeds', f"{n}.xml"), 'w', encoding='utf-8') as f:
+                f.write(self.feed(n))
+
+
+def make_handler(corpus, saved_dir=None, latency=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+
+            path = self.path.split('?', 1)[0]
+            body, content_type = self._saved(path) if saved_dir else (None, None)
+            if body is None:
+                body, content_type = self._generated(path)
+            if body is None:
+                self._reply(404, b'Not found', 'text/plain')
+                return
+
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self._reply(304, b'', content_type, etag)
+                return
+            self._reply(200, body, content_type, etag)
+
+        def _saved(self, path):
+            file_path = os.path.normpath(os.path.join(saved_dir, path.lstrip('/')))
+            if not file_path.startswith(os.path.abspath(saved_dir)) or not os.path.isfile(file_path):
+                return None, None
+            with open(file_path, 'rb') as f:
+                body = f.read()
+            return body, 'application/rss+xml' if file_path.endswith('.xml') else 'text/html; charset=utf-8'
+
+        def _generated(self, path):
+            match = _POST_PATH.match(path)
+            if match:
+                return corpus.post(int(match.group(1))).encode('utf-8'), 'text/html; charset=utf-8'
+            match = _FEED_PATH.match(path)
+            if match and int(match.group(1)) < corpus.feeds:
+                return corpus.feed(int(match.group(1))).encode('utf-8'), 'application/rss+xml'
+            return None, None
+
+        def _reply(self, status, body, content_type, etag=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve blog posts and RSS feeds for load tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generated text')
+    parser.add_argument('--feeds', type=int, default=10, help='Number of generated feeds')
+    parser.add_argument('--items', type=int, default=20, help='Entries listed in each feed')
+    parser.add_argument('--post-interval', type=float, default=60.0,
+                        help='Seconds between new posts in each feed')
+    parser.add_argument('--min-words', type=int, default=300)
+    parser.add_argument('--max-words', type=int, default=3000)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--corpus', help='Directory of saved .html and .xml files to serve')
+    parser.add_argument('--save', help='Write a generated corpus to this directory and exit')
+    parser.add_argument('--posts', type=int, default=200, help='Posts written by --save')
+    args = parser.parse_args()
+
+    corpus = Corpus(f"http://{args.host}:{args.port}", seed=args.seed, feeds=args.feeds, items=args.items,
+                    post_interval=args.post_interval, min_words=args.min_words, max_words=args.max_words)
+    if args.save:
+        corpus.save(args.save, args.posts)
+        print(f"Wrote {args.posts} posts and {args.feeds} feeds to {args.save}")
+        return
+
+    saved_dir = os.path.abspath(args.corpus) if args.corpus else None
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(corpus, saved_dir, args.latency))
+    print(f"Corpus server listening on http://{args.host}:{args.port}/", flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Database concurrency stress test
+
+Runs many submitters, queue workers and status pollers against one SQLite
+file at the same time, the way the web app and worker threads share it, and
+fails if any of them hits a database error such as "database is locked".
+
+No network or TTS calls are made: workers write the same rows the pipeline
+stages write, in the same number of commits.
+
+Usage:
+    python loadtest/db_stress.py --jobs 200 --workers 8 --pollers 8
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from app.models.audio_content import AudioContent
+from app.models.job import Job
+from app.services.job_queue import JobQueue
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stress concurrent database access")
+    parser.add_argument('--jobs', type=int, default=200, help='Conversions to submit')
+    parser.add_argument('--submitters', type=int, default=4, help='Threads submitting URLs through the API')
+    parser.add_argument('--workers', type=int, default=8, help='Threads claiming and running jobs')
+    parser.add_argument('--pollers', type=int, default=8, help='Threads polling job status')
+    parser.add_argument('--database', help='SQLAlchemy URL (default: a fresh SQLite file)')
+    parser.add_argument('--timeout', type=int, default=300, help='Seconds before giving up')
+    return parser.parse_args()
+
+
+class Stress:
+    def __init__(self, app, args):
+        self.app = app
+        self.args = args
+        self.errors = []
+        self.submitted = []
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def record_error(self, role):
+        with self._lock:
+            self.errors.append((role, traceback.format_exc()))
+
+    def submit(self, urls):
+        client = self.app.test_client()
+        for url in urls:
+            try:
+                response = client.post('/api/convert', json={'url': url, 'voice': 'onyx'})
+                if response.status_code != 200:
+                    raise RuntimeError(f"Submit returned {response.status_code}: {response.get_data(as_text=True)}")
+                with self._lock:
+                    self.submitted.append(response.get_json()['content_id'])
+            except Exception:
+                self.record_error('submit')
+
+    def work(self, worker_id):
+        while not self.done.is_set():
+            try:
+                with self.app.app_context():
+                    queue = JobQueue()
+                    job = queue.claim(worker_id)
+                    if job is None:
+                        time.sleep(0.01)
+                        continue
+                    self.run_job(queue, job, worker_id)
+            except Exception:
+                self.record_error('worker')
+
+    def run_job(self, queue, job, worker_id):
+        """Write what the pipeline stages write, one commit per stage"""
+        content = AudioContent.query.get(job.content_id)
+        content.state = AudioContent.STATE_PROCESSING
+        db.session.commit()
+
+        content.title = f"Article {content.id}"
+        content.original_text = "Lorem ipsum dolor sit amet. " * random.randint(50, 400)
+        db.session.commit()
+
+        queue.heartbeat(worker_id, [job.id])
+
+        content.processed_text = content.original_text.strip()
+        content.word_count = len(content.processed_text.split())
+        db.session.commit()
+
+        content.file_path = os.path.join('static', 'audio', content.filename)
+        content.duration = content.word_count / 2.5
+        content.state = AudioContent.STATE_COMPLETED
+        db.session.commit()
+
+        queue.complete(job.id, worker_id)
+
+    def poll(self):
+        client = self.app.test_client()
+        while not self.done.is_set():
+            with self._lock:
+                content_ids = list(self.submitted)
+            if not content_ids:
+                time.sleep(0.01)
+                continue
+            try:
+                response = client.get(f'/api/status/{random.choice(content_ids)}')
+                if response.status_code != 200:
+                    raise RuntimeError(f"Status returned {response.status_code}")
+            except Exception:
+                self.record_error('poll')
+
+    def finished_count(self):
+        with self.app.app_context():
+            return Job.query.filter_by(status='done').count()
+
+    def run(self):
+        urls = [f"https://example.com/post-{i}" for i in range(self.args.jobs)]
+        submitters = [threading.Thread(target=self.submit, args=(urls[i::self.args.submitters],))
+                      for i in range(self.args.submitters)]
+        background = [threading.Thread(target=self.work, args=(f"stress-{i}",), daemon=True)
+                      for i in range(self.args.workers)]
+        background += [threading.Thread(target=self.poll, daemon=True) for _ in range(self.args.pollers)]
+
+        start = time.monotonic()
+        for thread in submitters + background:
+            thread.start()
+        for thread in submitters:
+            thread.join()
+
+        deadline = start + self.args.timeout
+        while self.finished_count() < len(self.submitted) and time.monotonic() < deadline and not self.errors:
+            time.sleep(0.2)
+        self.done.set()
+        for thread in background:
+            thread.join()
+
+        return time.monotonic() - start
+
+
+def main():
+    args = parse_args()
+    database = args.database
+    if not database:
+        database = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='blog2audio_stress_'), 'stress.db')
+
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': database,
+        'RATELIMIT_ENABLED': False,
+        'JOB_QUEUE_MAX_DEPTH': 0,
+        'ADMISSION_MAX_BACKLOG': 0,
+    })
+    with app.app_context():
+        db.create_all()
+
+    stress = Stress(app, args)
+    elapsed = stress.run()
+    completed = stress.finished_count()
+
+    print(f"Database:  {database}")
+    print(f"Submitted: {len(stress.submitted)} of {args.jobs}")
+    print(f"Completed: {completed} in {elapsed:.1f}s")
+    print(f"Errors:    {len(stress.errors)}")
+    for role, error in stress.errors[:5]:
+        print(f"\n[{role}]\n{error}")
+
+    if stress.errors or completed != args.jobs:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test with local stand-ins for the web, feeds and TTS
+
+Starts loadtest/corpus_server.py and loadtest/fake_tts.py as subprocesses
+(unless --corpus-url or --tts-url point at ones already running), creates
+the app on a fresh database with in-process queue workers, then drives
+POST /api/convert, POST /process and POST /rss/feeds/<id>/refresh from
+--concurrency client threads and waits for every queued conversion to
+finish. No request leaves the machine.
+
+The report gives throughput and p50/p95/p99 latency per route, p50/p95/p99
+of the timings the pipeline recorded per stage, conversions finished per
+second, peak RSS of this process (app and workers) and database lock
+errors. --json writes the same figures to a file, so runs before and after
+a change can be compared. Combining multi-chunk audio needs ffmpeg, as in
+production.
+
+Usage:
+    python loadtest/e2e.py --convert 100 --process 50 --refresh 50 --concurrency 8
+    python loadtest/e2e.py --tts-chars-per-second 0 --json after.json
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import queue
+import random
+import socket
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app, db
+from app.models.audio_content import AudioContent
+from app.models.job import Job
+from app.models.rss_feed import RssFeed
+from app.services.worker import Worker
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+FIRST_POST = 100000  # Submitted posts are numbered apart from the ones the feeds list
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Load test the app end to end against local stand-ins')
+    parser.add_argument('--convert', type=int, default=100, help='POST /api/convert requests')
+    parser.add_argument('--process', type=int, default=50, help='POST /process requests')
+    parser.add_argument('--refresh', type=int, default=50, help='POST /rss/feeds/<id>/refresh requests')
+    parser.add_argument('--feeds', type=int, default=10, help='Feeds added before the run')
+    parser.add_argument('--repeat', type=float, default=0.1,
+                        help='Share of submissions that repeat an earlier URL')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads sending requests')
+    parser.add_argument('--workers', type=int, default=2, help='Queue workers, each with its own pipeline')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the corpus and the request mix')
+    parser.add_argument('--corpus', help='Directory of saved posts and feeds for the corpus server')
+    parser.add_argument('--corpus-url', help='Use a corpus server that is already running')
+    parser.add_argument('--tts-url', help='Use a TTS endpoint that is already running, e.g. http://host:8902/v1')
+    parser.add_argument('--tts-latency', type=float, default=0.2, help='Seconds the fake TTS adds per request')
+    parser.add_argument('--tts-chars-per-second', type=float, default=250.0,
+                        help='Synthesis speed of the fake TTS; 0 for no delay')
+    parser.add_argument('--database', help='SQLAlchemy URL (default: a fresh SQLite file)')
+    parser.add_argument('--timeout', type=int, default=600, help='Seconds to wait for conversions to finish')
+    parser.add_argument('--json', help='Also write the results to this file')
+    return parser.parse_args()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(script, port, ready_url, args=()):
+    """Run a stand-in server in a subprocess and wait until it answers"""
+    process = subprocess.Popen([sys.executable, os.path.join(LOADTEST_DIR, script), '--port', str(port), *args],
+                               stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            requests.get(ready_url, timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"{script} did not start on port {port}")
+
+
+def percentiles(values):
+    """Return p50, p95 and p99 of values (nearest rank), or Nones if there are none"""
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None}
+    ordered = sorted(values)
+    return {f"p{p}": ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] for p in (50, 95, 99)}
+
+
+class LoadTest:
+    def __init__(self, app, args, corpus_url):
+        self.app = app
+        self.args = args
+        self.corpus_url = corpus_url
+        self.rng = random.Random(args.seed)
+        self.latencies = defaultdict(list)  # route -> seconds
+        self.failures = defaultdict(int)  # route -> failed requests
+        self.errors = []
+        self.lock_errors = 0
+        self.db_errors = 0
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def count_db_error(self, context):
+        with self._lock:
+            if 'locked' in str(context.original_exception):
+                self.lock_errors += 1
+            else:
+                self.db_errors += 1
+
+    def request(self, client, route, method, path, ok, **kwargs):
+        """Send one request, recording its latency under route"""
+        start = time.perf_counter()
+        try:
+            response = client.open(path, method=method, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self.failures[route] += 1
+                self.errors.append(f"{route}: {e!r}")
+            return None
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            if not ok(response):
+                self.failures[route] += 1
+                self.errors.append(f"{route}: {response.status_code} {response.get_data(as_text=True)[:200]}")
+        return response
+
+    def add_feeds(self):
+        client = self.app.test_client()
+        for n in range(self.args.feeds):
+            self.request(client, 'rss_add', 'POST', '/rss/feeds/add', ok=lambda r: r.status_code == 302,
+                         data={'url': f"{self.corpus_url}/feeds/{n}.xml"})
+        with self.app.app_context():
+            return [feed_id for (feed_id,) in db.session.query(RssFeed.id).all()]
+
+    def plan(self, feed_ids):
+        """Build the shuffled list of requests to send"""
+        submissions = [('convert', None)] * self.args.convert + [('process', None)] * self.args.process
+        operations, used = [], []
+        for route, _ in submissions:
+            if used and self.rng.random() < self.args.repeat:
+                post = self.rng.choice(used)
+            else:
+                post = FIRST_POST + len(used)
+                used.append(post)
+            operations.append((route, f"{self.corpus_url}/posts/{post}.html"))
+        if feed_ids:
+            operations += [('refresh', self.rng.choice(feed_ids)) for _ in range(self.args.refresh)]
+        self.rng.shuffle(operations)
+        return operations
+
+    def drive(self, operations):
+        client = self.app.test_client()
+        while True:
+            try:
+                route, target = operations.get_nowait()
+            except queue.Empty:
+                return
+            if route == 'convert':
+                self.request(client, route, 'POST', '/api/convert', ok=lambda r: r.status_code == 200,
+                             json={'url': target, 'voice': 'onyx'})
+            elif route == 'process':
+                self.request(client, route, 'POST', '/process',
+                             ok=lambda r: r.status_code == 302 and re.search(r'/(processing|result)/', r.location),
+                             data={'url': target, 'voice': 'onyx'})
+            else:
+                self.request(client, route, 'POST', f"/rss/feeds/{target}/refresh",
+                             ok=lambda r: r.status_code == 302)
+
+    def work(self, worker):
+        """Feed the worker's pipeline from the queue, like Worker.run without the signal handling"""
+        worker.pipeline.start()
+        while not self.done.is_set():
+            try:
+                if not worker.pipeline.has_capacity() or not worker.run_once():
+                    time.sleep(0.05)
+            except Exception as e:
+                with self._lock:
+                    self.errors.append(f"worker: {e!r}")
+                time.sleep(0.5)
+        worker.pipeline.stop()
+
+    def unfinished_jobs(self):
+        with self.app.app_context():
+            return Job.query.filter(Job.status.in_(('queued', 'running'))).count()
+
+    def run(self):
+        workers = [Worker(self.app, f"loadtest-{i}") for i in range(self.args.workers)]
+        worker_threads = [threading.Thread(target=self.work, args=(worker,), daemon=True) for worker in workers]
+        for thread in worker_threads:
+            thread.start()
+
+        feed_ids = self.add_feeds()
+        operations = queue.Queue()
+        for operation in self.plan(feed_ids):
+            operations.put(operation)
+
+        start = time.monotonic()
+        clients = [threading.Thread(target=self.drive, args=(operations,)) for _ in range(self.args.concurrency)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        requests_elapsed = time.monotonic() - start
+
+        deadline = start + self.args.timeout
+        while self.unfinished_jobs() and time.monotonic() < deadline:
+            time.sleep(0.2)
+        total_elapsed = time.monotonic() - start
+
+        self.done.set()
+        for thread in worker_threads:
+            thread.join()
+        return requests_elapsed, total_elapsed
+
+    def results(self, requests_elapsed, total_elapsed):
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            routes[route] = {
+                'requests': len(latencies),
+                'failed': self.failures[route],
+                'per_second': len(latencies) / requests_elapsed if route != 'rss_add' and requests_elapsed else None,
+                **{name: value * 1000 if value is not None else None
+                   for name, value in percentiles(latencies).items()},
+            }
+
+        stage_seconds, stage_waits = defaultdict(list), defaultdict(list)
+        with self.app.app_context():
+            rows = db.session.query(AudioContent.state, AudioContent.stage_timings).all()
+            jobs = dict(db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all())
+        states = defaultdict(int)
+        for state, timings in rows:
+            states[state] += 1
+            for record in timings or []:
+                stage_seconds[record['stage']].append(record['seconds'])
+                if record.get('wait') is not None:
+                    stage_waits[record['stage']].append(record['wait'])
+
+        stages = {
+            stage: {'count': len(seconds), **percentiles(seconds),
+                    **{f"wait_{name}": value for name, value in percentiles(stage_waits[stage]).items()}}
+            for stage, seconds in sorted(stage_seconds.items())
+        }
+        return {
+            'requests_seconds': requests_elapsed,
+            'total_seconds': total_elapsed,
+            'routes': routes,
+            'stages': stages,
+            'content_states': dict(states),
+            'jobs': jobs,
+            'conversions_per_second': states[AudioContent.STATE_COMPLETED] / total_elapsed if total_elapsed else None,
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'db_lock_errors': self.lock_errors,
+            'db_other_errors': self.db_errors,
+            'errors': self.errors[:20],
+        }
+
+
+def print_report(results):
+    def ms(value):
+        return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+
+    print(f"\nRequests sent in {results['requests_seconds']:.1f}s, "
+          f"all work finished in {results['total_seconds']:.1f}s\n")
+    print(f"{'route':<12}{'requests':>9}{'failed':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for route, stats in results['routes'].items():
+        per_second = f"{stats['per_second']:9.1f}" if stats['per_second'] is not None else f"{'-':>9}"
+        print(f"{route:<12}{stats['requests']:>9}{stats['failed']:>8}{per_second}"
+              f"{ms(stats['p50'])}{ms(stats['p95'])}{ms(stats['p99'])}")
+
+    print(f"\n{'stage':<18}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'wait p95':>10}")
+    for stage, stats in results['stages'].items():
+        wait = f"{stats['wait_p95']:10.3f}" if stats['wait_p95'] is not None else f"{'-':>10}"
+        print(f"{stage:<18}{stats['count']:>7}{stats['p50']:9.3f}{stats['p95']:9.3f}{stats['p99']:9.3f}{wait}")
+
+    print(f"\nContent:        {results['content_states']}")
+    print(f"Jobs:           {results['jobs']}")
+    print(f"Conversions/s:  {results['conversions_per_second']:.2f}")
+    if 'tts' in results:
+        print(f"TTS requests:   {results['tts']}")
+    print(f"Peak RSS:       {results['peak_rss_mb']:.0f} MB")
+    print(f"DB lock errors: {results['db_lock_errors']} (other DB errors: {results['db_other_errors']})")
+    for error in results['errors'][:5]:
+        print(f"  {error}")
+
+
+def main():
+    args = parse_args()
+    work_dir = tempfile.mkdtemp(prefix='blog2audio_loadtest_')
+    servers = []
+    try:
+        corpus_url = args.corpus_url
+        if not corpus_url:
+            port = free_port()
+            corpus_url = f"http://127.0.0.1:{port}"
+            extra = ['--seed', str(args.seed), '--feeds', str(args.feeds)]
+            if args.corpus:
+                extra += ['--corpus', args.corpus]
+            servers.append(start_server('corpus_server.py', port, f"{corpus_url}/feeds/0.xml", extra))
+
+        tts_url = args.tts_url
+        if not tts_url:
+            port = free_port()
+            tts_url = f"http://127.0.0.1:{port}/v1"
+            servers.append(start_server('fake_tts.py', port, f"http://127.0.0.1:{port}/stats", [
+                '--latency', str(args.tts_latency), '--chars-per-second', str(args.tts_chars_per_second)
+            ]))
+
+        # The fake TTS ignores the key, but the OpenAI client needs one
+        os.environ['OPENAI_API_KEY'] = 'loadtest'
+
+        database = args.database or 'sqlite:///' + os.path.join(work_dir, 'loadtest.db')
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': database,
+            'RATELIMIT_ENABLED': False,
+            'JOB_QUEUE_MAX_DEPTH': 0,
+            'ADMISSION_MAX_BACKLOG': 0,
+            'CHUNK_WORK_FOLDER': os.path.join(work_dir, 'chunks'),
+            # Audio goes to the run's temporary directory instead of the app's static folder
+            'AUDIO_UPLOAD_FOLDER': os.path.join(work_dir, 'audio'),
+            'OPENAI_BASE_URL': tts_url,
+        })
+        with app.app_context():
+            db.create_all()
+            load_test = LoadTest(app, args, corpus_url)
+            event.listen(db.engine, 'handle_error', load_test.count_db_error)
+
+        results = load_test.results(*load_test.run())
+        if not args.tts_url:
+            results['tts'] = requests.get(tts_url.rsplit('/v1', 1)[0] + '/stats', timeout=5).json()
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+
+    failed = sum(stats['failed'] for stats in results['routes'].values())
+    if (failed or results['db_lock_errors'] or results['content_states'].get(AudioContent.STATE_ERROR)
+            or any(results['jobs'].get(status) for status in ('queued', 'running', 'failed'))):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI speech endpoint
+
+Answers POST /v1/audio/speech the way the real API does for the app's
+requests, with silent MP3 audio as long as the text would take to read
+(150 words per minute), so the combine stage and duration probes see
+realistic files. Request latency is --latency plus the text length divided
+by --chars-per-second; --error-rate makes a share of requests fail with a
+500, which the OpenAI client retries.
+
+Point the app at it with:
+    export OPENAI_BASE_URL=http://127.0.0.1:8902/v1 OPENAI_API_KEY=fake
+
+Usage:
+    python loadtest/fake_tts.py --port 8902 --chars-per-second 250
+"""
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# One MPEG-1 Layer III frame, 32 kbps, 44.1 kHz, mono, with zeroed side info: 1152 samples of silence
+SILENT_FRAME = b'\xff\xfb\x10\xc0' + b'\x00' * 100
+FRAME_SECONDS = 1152 / 44100
+WORDS_PER_MINUTE = 150
+
+
+def silent_mp3(text):
+    """Return silent MP3 audio lasting as long as text takes to read aloud"""
+    seconds = len(text.split()) / WORDS_PER_MINUTE * 60
+    return SILENT_FRAME * max(1, math.ceil(seconds / FRAME_SECONDS))
+
+
+class Stats:
+    def __init__(self):
+        self.requests = 0
+        self.chars = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, chars, error=False):
+        with self._lock:
+            self.requests += 1
+            self.chars += chars
+            self.errors += error
+
+    def as_dict(self):
+        with self._lock:
+            return {'requests': self.requests, 'chars': self.chars, 'errors': self.errors}
+
+
+def make_handler(stats, latency=0.0, chars_per_second=0.0, error_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/v1/audio/speech':
+                self._reply(404, json.dumps({'error': {'message': 'Not found'}}).encode(), 'application/json')
+                return
+
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                text = json.loads(self.rfile.read(length))['input']
+            except (ValueError, KeyError, TypeError):
+                self._reply(400, json.dumps({'error': {'message': "'input' is required"}}).encode(),
+                            'application/json')
+                return
+
+            time.sleep(latency + (len(text) / chars_per_second if chars_per_second else 0))
+            if error_rate and random.random() < error_rate:
+                stats.record(len(text), error=True)
+                self._reply(500, json.dumps({'error': {'message': 'Injected failure'}}).encode(),
+                            'application/json')
+                return
+
+            stats.record(len(text))
+            self._reply(200, silent_mp3(text), 'audio/mpeg')
+
+        def do_GET(self):
+            # Counters for the load test report
+            if self.path != '/stats':
+                self._reply(404, b'', 'text/plain')
+                return
+            self._reply(200, json.dumps(stats.as_dict()).encode(), 'application/json')
+
+        def _reply(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake text-to-speech endpoint')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8902)
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds added to every request')
+    parser.add_argument('--chars-per-second', type=float, default=250.0,
+                        help='Synthesis speed of one request; 0 for no delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests that fail with 500')
+    args = parser.parse_args()
+
+    handler = make_handler(Stats(), args.latency, args.chars_per_second, args.error_rate)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Fake TTS listening on http://{args.host}:{args.port}/v1", flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Local stand-in WebSub hub
+
+Implements enough of the WebSub hub protocol to exercise the app's
+subscription flow and push callback without a public hub:
+
+- POST / with hub.mode=subscribe|unsubscribe: accepted with 202, then the
+  intent is verified by calling the subscriber's callback with a challenge
+- POST / with hub.mode=publish and hub.url=<topic>: the topic is fetched
+  and pushed, signed with each subscriber's secret (X-Hub-Signature: sha256)
+- GET /subscriptions: the verified subscriptions, as JSON
+
+Point a feed at it by serving the feed with <link rel="hub" href="http://127.0.0.1:8900/"/>
+and set WEBSUB_CALLBACK_BASE_URL to an address this hub can reach.
+
+Usage:
+    python loadtest/websub_hub.py --port 8900
+    curl -d hub.mode=publish -d hub.url=http://127.0.0.1:8000/feed.xml http://127.0.0.1:8900/
+"""
+import hmac
+import json
+import time
+import hashlib
+import secrets
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode
+import requests
+
+
+class Hub:
+    def __init__(self):
+        self.subscriptions = {}  # (topic, callback) -> {'secret', 'expires'}
+        self._lock = threading.Lock()
+
+    def request_intent(self, mode, topic, callback, secret=None, lease_seconds=None):
+        """Verify a subscribe or unsubscribe request with the subscriber, as a hub does"""
+        challenge = secrets.token_hex(16)
+        params = {'hub.mode': mode, 'hub.topic': topic, 'hub.challenge': challenge}
+        if mode == 'subscribe':
+            params['hub.lease_seconds'] = str(lease_seconds or 86400)
+
+        separator = '&' if '?' in callback else '?'
+        try:
+            response = requests.get(f"{callback}{separator}{urlencode(params)}", timeout=10)
+        except requests.RequestException as e:
+            print(f"verify {mode} {callback}: {e}")
+            return
+        if response.status_code != 200 or response.text != challenge:
+            print(f"verify {mode} {callback}: refused ({response.status_code})")
+            return
+
+        with self._lock:
+            if mode == 'subscribe':
+                self.subscriptions[(topic, callback)] = {
+                    'secret': secret, 'expires': time.time() + int(params['hub.lease_seconds'])
+                }
+            else:
+                self.subscriptions.pop((topic, callback), None)
+        print(f"verified {mode} {topic} -> {callback}")
+
+    def publish(self, topic):
+        """Fetch a topic and push it to its subscribers; returns the number of deliveries"""
+        body = requests.get(topic, timeout=10).content
+        with self._lock:
+            targets = [(callback, sub['secret']) for (sub_topic, callback), sub in self.subscriptions.items()
+                       if sub_topic == topic and sub['expires'] > time.time()]
+
+        delivered = 0
+        for callback, secret in targets:
+            headers = {'Content-Type': 'application/rss+xml',
+                       'Link': f'<{topic}>; rel="self"'}
+            if secret:
+                headers['X-Hub-Signature'] = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            response = requests.post(callback, data=body, headers=headers, timeout=10)
+            print(f"pushed {topic} -> {callback}: {response.status_code}")
+            delivered += response.status_code < 300
+        return delivered
+
+
+def make_handler(hub):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/subscriptions':
+                self._reply(404, b'')
+                return
+            with hub._lock:
+                body = json.dumps([{'topic': topic, 'callback': callback, 'expires': sub['expires']}
+                                   for (topic, callback), sub in hub.subscriptions.items()])
+            self._reply(200, body.encode(), 'application/json')
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+            mode = form.get('hub.mode')
+
+            if mode in ('subscribe', 'unsubscribe'):
+                if not form.get('hub.topic') or not form.get('hub.callback'):
+                    self._reply(400, b'hub.topic and hub.callback are required')
+                    return
+                self._reply(202, b'')
+                threading.Thread(target=hub.request_intent, args=(
+                    mode, form['hub.topic'], form['hub.callback'], form.get('hub.secret'),
+                    int(form['hub.lease_seconds']) if form.get('hub.lease_seconds') else None
+                ), daemon=True).start()
+            elif mode == 'publish' and form.get('hub.url'):
+                delivered = hub.publish(form['hub.url'])
+                self._reply(200, json.dumps({'delivered': delivered}).encode(), 'application/json')
+            else:
+                self._reply(400, b'Unsupported hub.mode')
+
+        def _reply(self, status, body, content_type='text/plain'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stand-in WebSub hub')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(Hub()))
+    print(f"WebSub hub listening on http://{args.host}:{args.port}/")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
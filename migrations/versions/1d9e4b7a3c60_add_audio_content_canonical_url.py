@@ -0,0 +1,130 @@
+"""Add canonical URL to audio content and key claims on it
+
+Revision ID: 1d9e4b7a3c60
+Revises: f4a7c2b95e31
+Create Date: 2025-03-26 11:02:47.530918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import re
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+
+
+# revision identifiers, used by Alembic.
+revision = '1d9e4b7a3c60'
+down_revision = 'f4a7c2b95e31'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of app.services.url_canonicalizer.canonicalize_url, so re-running
+# this migration gives the same keys however the app's canonicalizer changes
+_TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'twclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'oly_anon_id', 'oly_enc_id',
+    'vero_id', 'ref', 'ref_src', 'ref_url', 'cmpid', 'spm', 'amp', 'outputtype',
+}
+_TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_', 'stm_')
+_AMP_CACHE_PATH = re.compile(r'^/[a-z]/(s/)?(?P<rest>.+)$')
+_AMP_PATH_SUFFIX = re.compile(r'/amp/?$')
+
+
+def canonicalize_url(url):
+    url = _unwrap_amp_cache(url.strip())
+    parts = urlsplit(url)
+
+    host = (parts.hostname or '').lower().rstrip('.')
+    for prefix in ('www.', 'amp.', 'm.'):
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    try:
+        port = parts.port
+    except ValueError:
+        port = parts.netloc.rpartition(':')[2]
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    path = _AMP_PATH_SUFFIX.sub('', path)
+    if path.endswith('.amp'):
+        path = path[:-len('.amp')]
+    for index in ('/index.html', '/index.htm', '/index.php'):
+        if path.endswith(index):
+            path = path[:-len(index) + 1]
+    path = path.rstrip('/') or '/'
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (key.lower() in _TRACKING_PARAMS or key.lower().startswith(_TRACKING_PREFIXES))
+    )
+
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def _unwrap_amp_cache(url):
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+
+    if host.endswith('.cdn.ampproject.org'):
+        match = _AMP_CACHE_PATH.match(parts.path)
+        if match:
+            scheme = 'https' if match.group(1) else 'http'
+            return f"{scheme}://{unquote(match.group('rest'))}"
+
+    if host in ('www.google.com', 'google.com') and parts.path.startswith('/amp/'):
+        rest = parts.path[len('/amp/'):]
+        if rest.startswith('s/'):
+            return f"https://{unquote(rest[2:])}"
+        return f"http://{unquote(rest)}"
+
+    return url
+
+
+def _rekey(conn, url_for_key):
+    """
+    Recompute every claim key, keeping one row per key
+
+    Completed rows win over unfinished ones and newer rows over older ones;
+    the rest stay unclaimed, like the duplicates in the original backfill.
+    """
+    rows = conn.execute(sa.text(
+        "SELECT id, url, voice FROM audio_content WHERE voice IS NOT NULL "
+        "ORDER BY CASE WHEN state = 'completed' THEN 0 ELSE 1 END, id DESC"
+    )).fetchall()
+
+    conn.execute(sa.text("UPDATE audio_content SET claim_key = NULL"))
+    seen = set()
+    for row_id, url, voice in rows:
+        key = hashlib.sha256(f"{url_for_key(url)}|{voice}".encode()).hexdigest()
+        if key in seen:
+            continue
+        seen.add(key)
+        conn.execute(sa.text("UPDATE audio_content SET claim_key = :key WHERE id = :id"),
+                     {'key': key, 'id': row_id})
+
+
+def upgrade():
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('canonical_url', sa.String(length=1024), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, url FROM audio_content")).fetchall()
+    for row_id, url in rows:
+        conn.execute(sa.text("UPDATE audio_content SET canonical_url = :canonical WHERE id = :id"),
+                     {'canonical': canonicalize_url(url), 'id': row_id})
+
+    _rekey(conn, canonicalize_url)
+
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.create_index('ix_audio_content_canonical_url_voice', ['canonical_url', 'voice'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.drop_index('ix_audio_content_canonical_url_voice')
+        batch_op.drop_column('canonical_url')
+
+    _rekey(op.get_bind(), lambda url: url)
@@ -0,0 +1,45 @@
+"""Add single-flight claim key to audio content
+
+Revision ID: 8f41d0a6c2e7
+Revises: 3b7e2c9a41d5
+Create Date: 2025-03-06 16:40:12.118503
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import hashlib
+
+
+# revision identifiers, used by Alembic.
+revision = '8f41d0a6c2e7'
+down_revision = '3b7e2c9a41d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claim_key', sa.String(length=64), nullable=True))
+
+    # Backfill the newest row for each URL and voice; older duplicates stay unclaimed
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT id, url, voice FROM audio_content WHERE voice IS NOT NULL ORDER BY id DESC"
+    )).fetchall()
+    seen = set()
+    for row_id, url, voice in rows:
+        key = hashlib.sha256(f"{url}|{voice}".encode()).hexdigest()
+        if key in seen:
+            continue
+        seen.add(key)
+        conn.execute(sa.text("UPDATE audio_content SET claim_key = :key WHERE id = :id"),
+                     {'key': key, 'id': row_id})
+
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_audio_content_claim_key'), ['claim_key'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_audio_content_claim_key'))
+        batch_op.drop_column('claim_key')
@@ -0,0 +1,95 @@
+"""Store audio content text compressed
+
+Revision ID: f4a7c2b95e31
+Revises: b2f6e0a93c18
+Create Date: 2025-03-24 09:18:36.204551
+
+"""
+import zlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a7c2b95e31'
+down_revision = 'b2f6e0a93c18'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+
+# Same layout as app.models.types.compress_text with the zlib codec
+def _compress(text):
+    data = text.encode('utf-8')
+    if len(data) < 64:
+        return b'\x00' + data
+    return b'\x01' + zlib.compress(data, 6)
+
+
+def _decompress(value):
+    value = bytes(value)
+    if value[:1] == b'\x00':
+        return value[1:].decode('utf-8')
+    if value[:1] == b'\x01':
+        return zlib.decompress(value[1:]).decode('utf-8')
+    raise ValueError("Text was stored with zstd; run 'flask recompress-text' with "
+                     "TEXT_COMPRESSION=zlib before downgrading")
+
+
+def _copy_columns(source, target, convert):
+    """Copy both text columns from source to target names in batches of BATCH_SIZE rows"""
+    bind = op.get_bind()
+    audio_content = sa.table('audio_content', sa.column('id', sa.Integer()),
+                             sa.column(f'original_{source}'), sa.column(f'processed_{source}'),
+                             sa.column(f'original_{target}'), sa.column(f'processed_{target}'))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(audio_content.c.id, audio_content.c[f'original_{source}'],
+                      audio_content.c[f'processed_{source}'])
+            .where(audio_content.c.id > last_id)
+            .order_by(audio_content.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        bind.execute(
+            audio_content.update().where(audio_content.c.id == sa.bindparam('row_id')).values({
+                f'original_{target}': sa.bindparam('original'),
+                f'processed_{target}': sa.bindparam('processed'),
+            }),
+            [{'row_id': row[0],
+              'original': convert(row[1]) if row[1] is not None else None,
+              'processed': convert(row[2]) if row[2] is not None else None} for row in rows]
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('original_compressed', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('processed_compressed', sa.LargeBinary(), nullable=True))
+
+    _copy_columns('text', 'compressed', _compress)
+
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.drop_column('original_text')
+        batch_op.drop_column('processed_text')
+        batch_op.alter_column('original_compressed', new_column_name='original_text')
+        batch_op.alter_column('processed_compressed', new_column_name='processed_text')
+
+
+def downgrade():
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('original_plain', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('processed_plain', sa.Text(), nullable=True))
+
+    _copy_columns('text', 'plain', _decompress)
+
+    with op.batch_alter_table('audio_content', schema=None) as batch_op:
+        batch_op.drop_column('original_text')
+        batch_op.drop_column('processed_text')
+        batch_op.alter_column('original_plain', new_column_name='original_text')
+        batch_op.alter_column('processed_plain', new_column_name='processed_text')
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Blog2Audio - RSS Scheduler Entry Point
+Run this file to poll RSS feeds as they come due
+"""
+import os
+import signal
+import logging
+import argparse
+import threading
+from datetime import datetime
+from dotenv import load_dotenv
+from app import create_app
+from app.services.rss_service import RssService
+from app.services.websub import WebSubManager
+from app.services.prefetch import Prefetcher
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger('scheduler')
+
+def main():
+    parser = argparse.ArgumentParser(description='Poll Blog2Audio RSS feeds on their schedules')
+    parser.add_argument('--once', action='store_true', help='Poll the feeds that are due now and exit')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s [scheduler] %(message)s')
+    app = create_app(os.getenv('FLASK_CONFIG') or 'development')
+    max_sleep = app.config['RSS_SCHEDULER_MAX_SLEEP']
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+
+    while not stopping.is_set():
+        with app.app_context():
+            try:
+                new_items = RssService().process_all_feeds()
+                if new_items:
+                    logger.info(f"Added {new_items} new feed items")
+                WebSubManager().renew_subscriptions()
+                Prefetcher().schedule()
+                next_poll = RssService().next_poll_time()
+            except Exception:
+                logger.exception("Feed sweep failed")
+                next_poll = None
+
+        if args.once:
+            break
+
+        # Sleep until the next feed is due, but look again regularly for new feeds
+        wait = max_sleep
+        if next_poll is not None:
+            wait = min(max((next_poll - datetime.utcnow()).total_seconds(), 1), max_sleep)
+        stopping.wait(wait)
+
+if __name__ == '__main__':
+    main()
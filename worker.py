@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Blog2Audio - Background Worker Entry Point
+Run this file to start the processes that consume the job queue
+"""
+import os
+import signal
+import logging
+import argparse
+import multiprocessing
+from dotenv import load_dotenv
+from app import create_app
+from app.services.worker import Worker
+
+# Load environment variables from .env file
+load_dotenv()
+
+def run_worker(config_name):
+    """Create an app in the child process and run a worker loop"""
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s %(levelname)s [%(processName)s] %(message)s')
+    app = create_app(config_name)
+    Worker(app).run()
+
+def main():
+    config_name = os.getenv('FLASK_CONFIG') or 'development'
+    app = create_app(config_name)
+
+    parser = argparse.ArgumentParser(description='Run Blog2Audio job queue workers')
+    parser.add_argument('-n', '--processes', type=int,
+                        default=app.config['WORKER_PROCESSES'],
+                        help='Number of worker processes to start')
+    args = parser.parse_args()
+
+    print(f"Starting {args.processes} worker process(es)")
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(config_name,), name=f'worker-{i}')
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    # Forward shutdown signals so each worker can finish its current job
+    def shutdown(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for process in processes:
+        process.join()
+
+if __name__ == '__main__':
+    main()